@@ -31,6 +31,34 @@ function wjr_count_contigs(url, auth, auth_cb, timeout, async_job_check_time_ms)
         return json_call_ajax("wjr_count_contigs.count_contigs",
             [workspace_name, contigset_id], 1, _callback, _errorCallback);
     };
+
+     this.count_contigs_in_workspace = function (workspace_name, _callback, _errorCallback) {
+        if (typeof workspace_name === 'function')
+            throw 'Argument workspace_name can not be a function';
+        if (_callback && typeof _callback !== 'function')
+            throw 'Argument _callback must be a function if defined';
+        if (_errorCallback && typeof _errorCallback !== 'function')
+            throw 'Argument _errorCallback must be a function if defined';
+        if (typeof arguments === 'function' && arguments.length > 1+2)
+            throw 'Too many arguments ('+arguments.length+' instead of '+(1+2)+')';
+        return json_call_ajax("wjr_count_contigs.count_contigs_in_workspace",
+            [workspace_name], 1, _callback, _errorCallback);
+    };
+
+     this.estimate_distinct_contigs = function (workspace_name, contigset_ids, _callback, _errorCallback) {
+        if (typeof workspace_name === 'function')
+            throw 'Argument workspace_name can not be a function';
+        if (typeof contigset_ids === 'function')
+            throw 'Argument contigset_ids can not be a function';
+        if (_callback && typeof _callback !== 'function')
+            throw 'Argument _callback must be a function if defined';
+        if (_errorCallback && typeof _errorCallback !== 'function')
+            throw 'Argument _errorCallback must be a function if defined';
+        if (typeof arguments === 'function' && arguments.length > 2+2)
+            throw 'Too many arguments ('+arguments.length+' instead of '+(2+2)+')';
+        return json_call_ajax("wjr_count_contigs.estimate_distinct_contigs",
+            [workspace_name, contigset_ids], 1, _callback, _errorCallback);
+    };
   
 
     /*
@@ -0,0 +1,116 @@
+
+package us.kbase.wjrcountcontigs;
+
+import java.util.HashMap;
+import java.util.Map;
+import javax.annotation.Generated;
+import com.fasterxml.jackson.annotation.JsonAnyGetter;
+import com.fasterxml.jackson.annotation.JsonAnySetter;
+import com.fasterxml.jackson.annotation.JsonInclude;
+import com.fasterxml.jackson.annotation.JsonProperty;
+import com.fasterxml.jackson.annotation.JsonPropertyOrder;
+
+
+/**
+ * <p>Original spec-file type: ContigSetDistinctEstimate</p>
+ * <pre>
+ * The contig count and estimated distinct contig count of one ContigSet.
+ * </pre>
+ * 
+ */
+@JsonInclude(JsonInclude.Include.NON_NULL)
+@Generated("com.googlecode.jsonschema2pojo")
+@JsonPropertyOrder({
+    "name",
+    "ref",
+    "contig_count",
+    "distinct_contig_estimate"
+})
+public class ContigSetDistinctEstimate {
+
+    @JsonProperty("name")
+    private String name;
+    @JsonProperty("ref")
+    private String ref;
+    @JsonProperty("contig_count")
+    private Long contigCount;
+    @JsonProperty("distinct_contig_estimate")
+    private Long distinctContigEstimate;
+    private Map<String, Object> additionalProperties = new HashMap<String, Object>();
+
+    @JsonProperty("name")
+    public String getName() {
+        return name;
+    }
+
+    @JsonProperty("name")
+    public void setName(String name) {
+        this.name = name;
+    }
+
+    public ContigSetDistinctEstimate withName(String name) {
+        this.name = name;
+        return this;
+    }
+
+    @JsonProperty("ref")
+    public String getRef() {
+        return ref;
+    }
+
+    @JsonProperty("ref")
+    public void setRef(String ref) {
+        this.ref = ref;
+    }
+
+    public ContigSetDistinctEstimate withRef(String ref) {
+        this.ref = ref;
+        return this;
+    }
+
+    @JsonProperty("contig_count")
+    public Long getContigCount() {
+        return contigCount;
+    }
+
+    @JsonProperty("contig_count")
+    public void setContigCount(Long contigCount) {
+        this.contigCount = contigCount;
+    }
+
+    public ContigSetDistinctEstimate withContigCount(Long contigCount) {
+        this.contigCount = contigCount;
+        return this;
+    }
+
+    @JsonProperty("distinct_contig_estimate")
+    public Long getDistinctContigEstimate() {
+        return distinctContigEstimate;
+    }
+
+    @JsonProperty("distinct_contig_estimate")
+    public void setDistinctContigEstimate(Long distinctContigEstimate) {
+        this.distinctContigEstimate = distinctContigEstimate;
+    }
+
+    public ContigSetDistinctEstimate withDistinctContigEstimate(Long distinctContigEstimate) {
+        this.distinctContigEstimate = distinctContigEstimate;
+        return this;
+    }
+
+    @JsonAnyGetter
+    public Map<String, Object> getAdditionalProperties() {
+        return this.additionalProperties;
+    }
+
+    @JsonAnySetter
+    public void setAdditionalProperties(String name, Object value) {
+        this.additionalProperties.put(name, value);
+    }
+
+    @Override
+    public String toString() {
+        return ((((((((((("ContigSetDistinctEstimate"+" [name=")+ name)+", ref=")+ ref)+", contigCount=")+ contigCount)+", distinctContigEstimate=")+ distinctContigEstimate)+", additionalProperties=")+ additionalProperties)+"]");
+    }
+
+}
@@ -0,0 +1,159 @@
+
+package us.kbase.wjrcountcontigs;
+
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+import javax.annotation.Generated;
+import com.fasterxml.jackson.annotation.JsonAnyGetter;
+import com.fasterxml.jackson.annotation.JsonAnySetter;
+import com.fasterxml.jackson.annotation.JsonInclude;
+import com.fasterxml.jackson.annotation.JsonProperty;
+import com.fasterxml.jackson.annotation.JsonPropertyOrder;
+
+
+/**
+ * <p>Original spec-file type: DistinctContigsEstimate</p>
+ * <pre>
+ * Estimates from HyperLogLog sketches of the contigs' md5 checksums.
+ * Contigs without an md5 cannot be compared and are counted as distinct,
+ * and a ContigSet listed more than once is counted once.
+ * distinct_contig_estimate - distinct contigs across all the ContigSets.
+ * duplicate_contig_estimate - total_contig_count minus the distinct count.
+ * shared_contig_estimate - distinct contigs counted in more than one
+ *     ContigSet, summed over the extra ContigSets they appear in.
+ * </pre>
+ * 
+ */
+@JsonInclude(JsonInclude.Include.NON_NULL)
+@Generated("com.googlecode.jsonschema2pojo")
+@JsonPropertyOrder({
+    "contigset_count",
+    "total_contig_count",
+    "distinct_contig_estimate",
+    "duplicate_contig_estimate",
+    "shared_contig_estimate",
+    "per_set"
+})
+public class DistinctContigsEstimate {
+
+    @JsonProperty("contigset_count")
+    private Long contigsetCount;
+    @JsonProperty("total_contig_count")
+    private Long totalContigCount;
+    @JsonProperty("distinct_contig_estimate")
+    private Long distinctContigEstimate;
+    @JsonProperty("duplicate_contig_estimate")
+    private Long duplicateContigEstimate;
+    @JsonProperty("shared_contig_estimate")
+    private Long sharedContigEstimate;
+    @JsonProperty("per_set")
+    private List<ContigSetDistinctEstimate> perSet;
+    private Map<String, Object> additionalProperties = new HashMap<String, Object>();
+
+    @JsonProperty("contigset_count")
+    public Long getContigsetCount() {
+        return contigsetCount;
+    }
+
+    @JsonProperty("contigset_count")
+    public void setContigsetCount(Long contigsetCount) {
+        this.contigsetCount = contigsetCount;
+    }
+
+    public DistinctContigsEstimate withContigsetCount(Long contigsetCount) {
+        this.contigsetCount = contigsetCount;
+        return this;
+    }
+
+    @JsonProperty("total_contig_count")
+    public Long getTotalContigCount() {
+        return totalContigCount;
+    }
+
+    @JsonProperty("total_contig_count")
+    public void setTotalContigCount(Long totalContigCount) {
+        this.totalContigCount = totalContigCount;
+    }
+
+    public DistinctContigsEstimate withTotalContigCount(Long totalContigCount) {
+        this.totalContigCount = totalContigCount;
+        return this;
+    }
+
+    @JsonProperty("distinct_contig_estimate")
+    public Long getDistinctContigEstimate() {
+        return distinctContigEstimate;
+    }
+
+    @JsonProperty("distinct_contig_estimate")
+    public void setDistinctContigEstimate(Long distinctContigEstimate) {
+        this.distinctContigEstimate = distinctContigEstimate;
+    }
+
+    public DistinctContigsEstimate withDistinctContigEstimate(Long distinctContigEstimate) {
+        this.distinctContigEstimate = distinctContigEstimate;
+        return this;
+    }
+
+    @JsonProperty("duplicate_contig_estimate")
+    public Long getDuplicateContigEstimate() {
+        return duplicateContigEstimate;
+    }
+
+    @JsonProperty("duplicate_contig_estimate")
+    public void setDuplicateContigEstimate(Long duplicateContigEstimate) {
+        this.duplicateContigEstimate = duplicateContigEstimate;
+    }
+
+    public DistinctContigsEstimate withDuplicateContigEstimate(Long duplicateContigEstimate) {
+        this.duplicateContigEstimate = duplicateContigEstimate;
+        return this;
+    }
+
+    @JsonProperty("shared_contig_estimate")
+    public Long getSharedContigEstimate() {
+        return sharedContigEstimate;
+    }
+
+    @JsonProperty("shared_contig_estimate")
+    public void setSharedContigEstimate(Long sharedContigEstimate) {
+        this.sharedContigEstimate = sharedContigEstimate;
+    }
+
+    public DistinctContigsEstimate withSharedContigEstimate(Long sharedContigEstimate) {
+        this.sharedContigEstimate = sharedContigEstimate;
+        return this;
+    }
+
+    @JsonProperty("per_set")
+    public List<ContigSetDistinctEstimate> getPerSet() {
+        return perSet;
+    }
+
+    @JsonProperty("per_set")
+    public void setPerSet(List<ContigSetDistinctEstimate> perSet) {
+        this.perSet = perSet;
+    }
+
+    public DistinctContigsEstimate withPerSet(List<ContigSetDistinctEstimate> perSet) {
+        this.perSet = perSet;
+        return this;
+    }
+
+    @JsonAnyGetter
+    public Map<String, Object> getAdditionalProperties() {
+        return this.additionalProperties;
+    }
+
+    @JsonAnySetter
+    public void setAdditionalProperties(String name, Object value) {
+        this.additionalProperties.put(name, value);
+    }
+
+    @Override
+    public String toString() {
+        return ((((((((((((((("DistinctContigsEstimate"+" [contigsetCount=")+ contigsetCount)+", totalContigCount=")+ totalContigCount)+", distinctContigEstimate=")+ distinctContigEstimate)+", duplicateContigEstimate=")+ duplicateContigEstimate)+", sharedContigEstimate=")+ sharedContigEstimate)+", perSet=")+ perSet)+", additionalProperties=")+ additionalProperties)+"]");
+    }
+
+}
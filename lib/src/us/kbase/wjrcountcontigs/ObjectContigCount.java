@@ -0,0 +1,119 @@
+
+package us.kbase.wjrcountcontigs;
+
+import java.util.HashMap;
+import java.util.Map;
+import javax.annotation.Generated;
+import com.fasterxml.jackson.annotation.JsonAnyGetter;
+import com.fasterxml.jackson.annotation.JsonAnySetter;
+import com.fasterxml.jackson.annotation.JsonInclude;
+import com.fasterxml.jackson.annotation.JsonProperty;
+import com.fasterxml.jackson.annotation.JsonPropertyOrder;
+
+
+/**
+ * <p>Original spec-file type: ObjectContigCount</p>
+ * <pre>
+ * The contig count of one ContigSet in a workspace.
+ * ref - the ContigSet's reference, including its version.
+ * error - why the ContigSet could not be counted, for example because it
+ *     was deleted after it was listed; contig_count is then left out.
+ * </pre>
+ * 
+ */
+@JsonInclude(JsonInclude.Include.NON_NULL)
+@Generated("com.googlecode.jsonschema2pojo")
+@JsonPropertyOrder({
+    "name",
+    "ref",
+    "contig_count",
+    "error"
+})
+public class ObjectContigCount {
+
+    @JsonProperty("name")
+    private String name;
+    @JsonProperty("ref")
+    private String ref;
+    @JsonProperty("contig_count")
+    private Long contigCount;
+    @JsonProperty("error")
+    private String error;
+    private Map<String, Object> additionalProperties = new HashMap<String, Object>();
+
+    @JsonProperty("name")
+    public String getName() {
+        return name;
+    }
+
+    @JsonProperty("name")
+    public void setName(String name) {
+        this.name = name;
+    }
+
+    public ObjectContigCount withName(String name) {
+        this.name = name;
+        return this;
+    }
+
+    @JsonProperty("ref")
+    public String getRef() {
+        return ref;
+    }
+
+    @JsonProperty("ref")
+    public void setRef(String ref) {
+        this.ref = ref;
+    }
+
+    public ObjectContigCount withRef(String ref) {
+        this.ref = ref;
+        return this;
+    }
+
+    @JsonProperty("contig_count")
+    public Long getContigCount() {
+        return contigCount;
+    }
+
+    @JsonProperty("contig_count")
+    public void setContigCount(Long contigCount) {
+        this.contigCount = contigCount;
+    }
+
+    public ObjectContigCount withContigCount(Long contigCount) {
+        this.contigCount = contigCount;
+        return this;
+    }
+
+    @JsonProperty("error")
+    public String getError() {
+        return error;
+    }
+
+    @JsonProperty("error")
+    public void setError(String error) {
+        this.error = error;
+    }
+
+    public ObjectContigCount withError(String error) {
+        this.error = error;
+        return this;
+    }
+
+    @JsonAnyGetter
+    public Map<String, Object> getAdditionalProperties() {
+        return this.additionalProperties;
+    }
+
+    @JsonAnySetter
+    public void setAdditionalProperties(String name, Object value) {
+        this.additionalProperties.put(name, value);
+    }
+
+    @Override
+    public String toString() {
+        return ((((((((((("ObjectContigCount"+" [name=")+ name)+", ref=")+ ref)+", contigCount=")+ contigCount)+", error=")+ error)+", additionalProperties=")+ additionalProperties)+"]");
+    }
+
+}
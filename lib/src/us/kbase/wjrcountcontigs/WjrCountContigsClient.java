@@ -16,7 +16,8 @@ import us.kbase.common.service.UnauthorizedException;
  * <p>Original spec-file module name: wjr_count_contigs</p>
  * <pre>
  * A KBase module: wjr_count_contigs
- * This sample module contains one small method - count_contigs.
+ * This sample module contains three small methods - count_contigs,
+ * count_contigs_in_workspace and estimate_distinct_contigs.
  * </pre>
  */
 public class WjrCountContigsClient {
@@ -159,4 +160,44 @@ public class WjrCountContigsClient {
         List<CountContigsResults> res = caller.jsonrpcCall("wjr_count_contigs.count_contigs", args, retType, true, true, jsonRpcContext);
         return res.get(0);
     }
+
+    /**
+     * <p>Original spec-file function name: count_contigs_in_workspace</p>
+     * <pre>
+     * Count contigs in every ContigSet in a workspace
+     * workspace_name - the workspace to search.
+     * </pre>
+     * @param   arg1   instance of original type "workspace_name" (A string representing a workspace name.)
+     * @return   instance of type {@link us.kbase.wjrcountcontigs.WorkspaceContigCounts WorkspaceContigCounts} (cached_count - how many of the counts were reused from earlier calls. error_count - how many ContigSets could not be counted; they are left out of total_contig_count.)
+     * @throws IOException if an IO exception occurs
+     * @throws JsonClientException if a JSON RPC exception occurs
+     */
+    public WorkspaceContigCounts countContigsInWorkspace(String arg1, RpcContext... jsonRpcContext) throws IOException, JsonClientException {
+        List<Object> args = new ArrayList<Object>();
+        args.add(arg1);
+        TypeReference<List<WorkspaceContigCounts>> retType = new TypeReference<List<WorkspaceContigCounts>>() {};
+        List<WorkspaceContigCounts> res = caller.jsonrpcCall("wjr_count_contigs.count_contigs_in_workspace", args, retType, true, true, jsonRpcContext);
+        return res.get(0);
+    }
+
+    /**
+     * <p>Original spec-file function name: estimate_distinct_contigs</p>
+     * <pre>
+     * Estimate how many unique contigs there are across ContigSets
+     * contigset_ids - the ContigSets to compare.
+     * </pre>
+     * @param   arg1   instance of original type "workspace_name" (A string representing a workspace name.)
+     * @param   contigsetIds   instance of list of original type "contigset_id" (A string representing a ContigSet id.)
+     * @return   instance of type {@link us.kbase.wjrcountcontigs.DistinctContigsEstimate DistinctContigsEstimate} (Estimates from HyperLogLog sketches of the contigs' md5 checksums. Contigs without an md5 cannot be compared and are counted as distinct, and a ContigSet listed more than once is counted once. distinct_contig_estimate - distinct contigs across all the ContigSets. duplicate_contig_estimate - total_contig_count minus the distinct count. shared_contig_estimate - distinct contigs counted in more than one ContigSet, summed over the extra ContigSets they appear in.)
+     * @throws IOException if an IO exception occurs
+     * @throws JsonClientException if a JSON RPC exception occurs
+     */
+    public DistinctContigsEstimate estimateDistinctContigs(String arg1, List<String> contigsetIds, RpcContext... jsonRpcContext) throws IOException, JsonClientException {
+        List<Object> args = new ArrayList<Object>();
+        args.add(arg1);
+        args.add(contigsetIds);
+        TypeReference<List<DistinctContigsEstimate>> retType = new TypeReference<List<DistinctContigsEstimate>>() {};
+        List<DistinctContigsEstimate> res = caller.jsonrpcCall("wjr_count_contigs.estimate_distinct_contigs", args, retType, true, true, jsonRpcContext);
+        return res.get(0);
+    }
 }
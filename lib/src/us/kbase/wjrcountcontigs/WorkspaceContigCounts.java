@@ -0,0 +1,155 @@
+
+package us.kbase.wjrcountcontigs;
+
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+import javax.annotation.Generated;
+import com.fasterxml.jackson.annotation.JsonAnyGetter;
+import com.fasterxml.jackson.annotation.JsonAnySetter;
+import com.fasterxml.jackson.annotation.JsonInclude;
+import com.fasterxml.jackson.annotation.JsonProperty;
+import com.fasterxml.jackson.annotation.JsonPropertyOrder;
+
+
+/**
+ * <p>Original spec-file type: WorkspaceContigCounts</p>
+ * <pre>
+ * cached_count - how many of the counts were reused from earlier calls.
+ * error_count - how many ContigSets could not be counted; they are left
+ *     out of total_contig_count.
+ * </pre>
+ * 
+ */
+@JsonInclude(JsonInclude.Include.NON_NULL)
+@Generated("com.googlecode.jsonschema2pojo")
+@JsonPropertyOrder({
+    "workspace_name",
+    "object_count",
+    "total_contig_count",
+    "cached_count",
+    "error_count",
+    "counts"
+})
+public class WorkspaceContigCounts {
+
+    @JsonProperty("workspace_name")
+    private String workspaceName;
+    @JsonProperty("object_count")
+    private Long objectCount;
+    @JsonProperty("total_contig_count")
+    private Long totalContigCount;
+    @JsonProperty("cached_count")
+    private Long cachedCount;
+    @JsonProperty("error_count")
+    private Long errorCount;
+    @JsonProperty("counts")
+    private List<ObjectContigCount> counts;
+    private Map<String, Object> additionalProperties = new HashMap<String, Object>();
+
+    @JsonProperty("workspace_name")
+    public String getWorkspaceName() {
+        return workspaceName;
+    }
+
+    @JsonProperty("workspace_name")
+    public void setWorkspaceName(String workspaceName) {
+        this.workspaceName = workspaceName;
+    }
+
+    public WorkspaceContigCounts withWorkspaceName(String workspaceName) {
+        this.workspaceName = workspaceName;
+        return this;
+    }
+
+    @JsonProperty("object_count")
+    public Long getObjectCount() {
+        return objectCount;
+    }
+
+    @JsonProperty("object_count")
+    public void setObjectCount(Long objectCount) {
+        this.objectCount = objectCount;
+    }
+
+    public WorkspaceContigCounts withObjectCount(Long objectCount) {
+        this.objectCount = objectCount;
+        return this;
+    }
+
+    @JsonProperty("total_contig_count")
+    public Long getTotalContigCount() {
+        return totalContigCount;
+    }
+
+    @JsonProperty("total_contig_count")
+    public void setTotalContigCount(Long totalContigCount) {
+        this.totalContigCount = totalContigCount;
+    }
+
+    public WorkspaceContigCounts withTotalContigCount(Long totalContigCount) {
+        this.totalContigCount = totalContigCount;
+        return this;
+    }
+
+    @JsonProperty("cached_count")
+    public Long getCachedCount() {
+        return cachedCount;
+    }
+
+    @JsonProperty("cached_count")
+    public void setCachedCount(Long cachedCount) {
+        this.cachedCount = cachedCount;
+    }
+
+    public WorkspaceContigCounts withCachedCount(Long cachedCount) {
+        this.cachedCount = cachedCount;
+        return this;
+    }
+
+    @JsonProperty("error_count")
+    public Long getErrorCount() {
+        return errorCount;
+    }
+
+    @JsonProperty("error_count")
+    public void setErrorCount(Long errorCount) {
+        this.errorCount = errorCount;
+    }
+
+    public WorkspaceContigCounts withErrorCount(Long errorCount) {
+        this.errorCount = errorCount;
+        return this;
+    }
+
+    @JsonProperty("counts")
+    public List<ObjectContigCount> getCounts() {
+        return counts;
+    }
+
+    @JsonProperty("counts")
+    public void setCounts(List<ObjectContigCount> counts) {
+        this.counts = counts;
+    }
+
+    public WorkspaceContigCounts withCounts(List<ObjectContigCount> counts) {
+        this.counts = counts;
+        return this;
+    }
+
+    @JsonAnyGetter
+    public Map<String, Object> getAdditionalProperties() {
+        return this.additionalProperties;
+    }
+
+    @JsonAnySetter
+    public void setAdditionalProperties(String name, Object value) {
+        this.additionalProperties.put(name, value);
+    }
+
+    @Override
+    public String toString() {
+        return ((((((((((((((("WorkspaceContigCounts"+" [workspaceName=")+ workspaceName)+", objectCount=")+ objectCount)+", totalContigCount=")+ totalContigCount)+", cachedCount=")+ cachedCount)+", errorCount=")+ errorCount)+", counts=")+ counts)+", additionalProperties=")+ additionalProperties)+"]");
+    }
+
+}
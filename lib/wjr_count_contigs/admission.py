@@ -0,0 +1,208 @@
+'''
+Admission control for the WSGI application.
+
+Limits how many requests run at once, both overall and per user, and lets a
+small number of requests wait briefly for a free slot. Anything beyond that is
+rejected immediately so that the caller can retry later, instead of tying up
+a server worker.
+
+The counters live in shared memory, so a controller created before the
+server forks its workers (in the uwsgi master, or by start_server) enforces
+its limits across all of them. A controller created after the fork only sees
+its own process.
+
+Each slot is also recorded against the process holding it, so that the slots
+of a worker which dies without releasing them (a crash, an OOM kill, a
+respawn) can be reclaimed instead of shrinking capacity for good.
+'''
+import errno
+import multiprocessing
+import os
+import time
+
+# layout of the shared counters
+_ACTIVE, _WAITING, _ADMITTED, _REJECTED, _RECLAIMED = range(5)
+
+
+class AdmissionRejected(Exception):
+
+    def __init__(self, reason, retry_after):
+        Exception.__init__(self, reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController(object):
+    '''
+    Arguments:
+    max_active -- maximum requests running at once, 0 for no limit
+    max_active_per_user -- maximum requests running at once for a single
+        key (user id or client ip), 0 for no limit
+    max_waiting -- maximum requests waiting for a slot
+    max_wait -- seconds a request may wait for a slot
+    user_slots -- size of the shared tables of per-key and per-process
+        counts; it must be well above the number of keys with requests
+        running at once
+    poll_interval -- seconds between checks for a free slot while waiting
+    '''
+
+    # how far a key's entry may be from its home slot in the table
+    PROBE_LIMIT = 32
+
+    def __init__(self, max_active=0, max_active_per_user=0, max_waiting=0,
+                 max_wait=0, user_slots=1024, poll_interval=0.05):
+        self.max_active = int(max_active)
+        self.max_active_per_user = int(max_active_per_user)
+        self.max_waiting = int(max_waiting)
+        self.max_wait = float(max_wait)
+        self.poll_interval = float(poll_interval)
+        self._lock = multiprocessing.Lock()
+        self._counters = multiprocessing.RawArray('l', 5)
+        self._user_keys = multiprocessing.RawArray('l', int(user_slots))
+        self._user_counts = multiprocessing.RawArray('l', int(user_slots))
+        # which process holds how many of a key's slots
+        self._owner_pids = multiprocessing.RawArray('l', int(user_slots))
+        self._owner_slots = multiprocessing.RawArray('l', int(user_slots))
+        self._owner_counts = multiprocessing.RawArray('l', int(user_slots))
+
+    def _retry_after(self):
+        return max(1, int(round(self.max_wait)))
+
+    def _find_slot(self, key_hash):
+        # a key's entry is the first slot in its probe window holding it;
+        # otherwise it gets the first free one
+        size = len(self._user_keys)
+        free = None
+        for i in range(min(self.PROBE_LIMIT, size)):
+            slot = (key_hash + i) % size
+            if self._user_counts[slot]:
+                if self._user_keys[slot] == key_hash:
+                    return slot
+            elif free is None:
+                free = slot
+        return free
+
+    def _find_owner(self, pid, slot):
+        # the same probing as _find_slot, keyed by process and key slot
+        size = len(self._owner_pids)
+        home = hash((pid, slot))
+        free = None
+        for i in range(min(self.PROBE_LIMIT, size)):
+            entry = (home + i) % size
+            if self._owner_counts[entry]:
+                if (self._owner_pids[entry] == pid and
+                        self._owner_slots[entry] == slot):
+                    return entry
+            elif free is None:
+                free = entry
+        return free
+
+    def _can_run(self, slot, owner):
+        if slot is None or owner is None:
+            return False
+        if self.max_active and self._counters[_ACTIVE] >= self.max_active:
+            return False
+        if (self.max_active_per_user and
+                self._user_counts[slot] >= self.max_active_per_user):
+            return False
+        return True
+
+    def _reject(self, reason):
+        self._counters[_REJECTED] += 1
+        raise AdmissionRejected(reason, self._retry_after())
+
+    def acquire(self, key):
+        '''Takes a slot for key, or raises AdmissionRejected.'''
+        key_hash = hash(key)
+        pid = os.getpid()
+        deadline = None
+        try:
+            while True:
+                with self._lock:
+                    if self._admit(key_hash, pid):
+                        return
+                    if deadline is None:
+                        if self._counters[_WAITING] >= self.max_waiting:
+                            # the slots may be held by dead processes
+                            if self._reclaim() and self._admit(key_hash, pid):
+                                return
+                            self._reject('Server is busy')
+                        self._counters[_WAITING] += 1
+                        deadline = time.time() + self.max_wait
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        if self._reclaim() and self._admit(key_hash, pid):
+                            return
+                        self._reject('Timed out waiting for a free slot')
+                # the lock is shared with other processes, so waiting polls
+                # instead of sleeping on a condition
+                time.sleep(min(self.poll_interval, remaining))
+        finally:
+            if deadline is not None:
+                with self._lock:
+                    self._counters[_WAITING] -= 1
+
+    def _admit(self, key_hash, pid):
+        slot = self._find_slot(key_hash)
+        owner = None if slot is None else self._find_owner(pid, slot)
+        if not self._can_run(slot, owner):
+            return False
+        self._counters[_ACTIVE] += 1
+        self._user_keys[slot] = key_hash
+        self._user_counts[slot] += 1
+        self._owner_pids[owner] = pid
+        self._owner_slots[owner] = slot
+        self._owner_counts[owner] += 1
+        self._counters[_ADMITTED] += 1
+        return True
+
+    def release(self, key):
+        key_hash = hash(key)
+        with self._lock:
+            slot = self._find_slot(key_hash)
+            if slot is None or not self._user_counts[slot]:
+                return
+            owner = self._find_owner(os.getpid(), slot)
+            if owner is None or not self._owner_counts[owner]:
+                # already reclaimed, or taken in another process
+                return
+            self._counters[_ACTIVE] -= 1
+            self._user_counts[slot] -= 1
+            self._owner_counts[owner] -= 1
+
+    def _reclaim(self):
+        # called with the lock held
+        reclaimed = 0
+        for entry in range(len(self._owner_pids)):
+            count = self._owner_counts[entry]
+            if not count or _alive(self._owner_pids[entry]):
+                continue
+            self._counters[_ACTIVE] -= count
+            self._user_counts[self._owner_slots[entry]] -= count
+            self._owner_counts[entry] = 0
+            reclaimed += count
+        self._counters[_RECLAIMED] += reclaimed
+        return reclaimed
+
+    def reclaim(self):
+        '''Releases the slots of processes that have exited without
+        releasing them, and returns how many there were.'''
+        with self._lock:
+            return self._reclaim()
+
+    def stats(self):
+        with self._lock:
+            return {'active': self._counters[_ACTIVE],
+                    'queue_depth': self._counters[_WAITING],
+                    'active_users': sum(1 for c in self._user_counts if c),
+                    'admitted': self._counters[_ADMITTED],
+                    'rejected': self._counters[_REJECTED],
+                    'reclaimed': self._counters[_RECLAIMED]}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
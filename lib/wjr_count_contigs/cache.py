@@ -0,0 +1,48 @@
+'''
+A small thread-safe LRU cache with an optional time to live.
+'''
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+
+    def __init__(self, max_size=1000, ttl=None):
+        if int(max_size) < 1:
+            raise ValueError('Cache size must be positive')
+        self.max_size = int(max_size)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, stored = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.ttl is not None and time.time() - stored > self.ttl:
+                self.misses += 1
+                return default
+            # re-insert to mark as most recently used
+            self._items[key] = (value, stored)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (value, time.time())
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {'size': len(self._items), 'hits': self.hits,
+                'misses': self.misses}
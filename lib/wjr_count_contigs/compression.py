@@ -0,0 +1,90 @@
+'''
+gzip support for request and response bodies.
+'''
+import zlib
+
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepts_gzip(accept_encoding):
+    '''True if an Accept-Encoding header value allows gzip. An explicit
+    gzip (or x-gzip) entry wins over *, so "gzip;q=0, *" refuses it.'''
+    explicit = None
+    wildcard = None
+    for item in (accept_encoding or '').split(','):
+        parts = [p.strip() for p in item.split(';')]
+        coding = parts[0].lower()
+        if coding not in ('gzip', 'x-gzip', '*'):
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0
+        if coding == '*':
+            wildcard = max(q, wildcard)
+        else:
+            explicit = max(q, explicit)
+    if explicit is not None:
+        return explicit > 0
+    return wildcard is not None and wildcard > 0
+
+
+def gunzip(data, max_size):
+    '''
+    Decompresses a gzip body, which may hold several gzip members, refusing
+    to produce more than max_size bytes so that a small request cannot
+    expand into an unbounded one. Raises ValueError for invalid, truncated
+    or oversized input.
+    '''
+    if not data:
+        raise ValueError('Invalid gzip request body: it is empty')
+    # Python 2's zlib cannot say whether a stream ended. Bytes past the end
+    # of a member are left in unused_data, so a sentinel byte after the data
+    # is left there only if the last member is complete.
+    rest = data + '\x00'
+    out = []
+    size = 0
+    while rest != '\x00':
+        d = zlib.decompressobj(_GZIP_WBITS)
+        try:
+            chunk = d.decompress(rest, max_size + 1 - size)
+        except zlib.error as e:
+            raise ValueError('Invalid gzip request body: %s' % e)
+        size += len(chunk)
+        if size > max_size or d.unconsumed_tail:
+            raise ValueError('Decompressed request body exceeds the limit ' +
+                             'of %d bytes' % max_size)
+        out.append(chunk)
+        if not d.unused_data:
+            raise ValueError('Invalid gzip request body: it is truncated')
+        rest = d.unused_data
+    return ''.join(out)
+
+
+def gzip_string(data, level=6):
+    c = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    return c.compress(data) + c.flush()
+
+
+def gzip_iter(chunks, level=6, flush_each=False):
+    '''
+    Compresses an iterable of strings as one gzip stream. With flush_each,
+    every chunk is flushed so that the client can decode it immediately,
+    which streamed records need.
+    '''
+    c = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    try:
+        for chunk in chunks:
+            out = c.compress(chunk)
+            if flush_each:
+                out += c.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield c.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
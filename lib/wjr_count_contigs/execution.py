@@ -0,0 +1,76 @@
+'''
+Selects how the server runs requests, from execution-mode in the config:
+
+threaded -- (default) each request holds an OS thread for its whole duration
+gevent -- requests are greenlets; socket, ssl, select, time and threading
+    are patched so that workspace and auth calls yield while they wait on
+    the network, and one worker can keep hundreds of counts in flight
+
+setup() must run before anything else imports socket, ssl or threading,
+which is why this module only depends on the standard library.
+'''
+from ConfigParser import ConfigParser
+
+THREADED = 'threaded'
+GEVENT = 'gevent'
+MODES = (THREADED, GEVENT)
+
+_mode = THREADED
+
+
+# the values ConfigParser.getboolean() accepts
+_BOOLEANS = {'1': True, 'yes': True, 'true': True, 'on': True,
+             '0': False, 'no': False, 'false': False, 'off': False}
+
+
+def read_config(config_file, section):
+    '''Returns the section of the deployment config as a dict, or None if
+    there is no config file. The server reads its config only through
+    here, once.'''
+    if not config_file:
+        return None
+    config = ConfigParser()
+    config.read(config_file)
+    return dict(config.items(section))
+
+
+def configured_mode(config):
+    '''Reads execution-mode from a config dict from read_config().'''
+    if not config:
+        return THREADED
+    if 'execution-mode' in config:
+        return config['execution-mode']
+    # the old switch for the same thing
+    flag = config.get('gevent_monkeypatch_all')
+    if flag is not None:
+        if flag.lower() not in _BOOLEANS:
+            raise ValueError('Not a boolean: gevent_monkeypatch_all = ' + flag)
+        if _BOOLEANS[flag.lower()]:
+            return GEVENT
+    return THREADED
+
+
+def setup(mode):
+    global _mode
+    if mode not in MODES:
+        raise ValueError('Unknown execution-mode: ' + str(mode) +
+                         '; expected one of ' + ', '.join(MODES))
+    if mode == GEVENT and _mode != GEVENT:
+        from gevent import monkey
+        # subprocess and signal handling stay as they are: the standalone
+        # server relies on plain SIGTERM handlers and os.wait
+        monkey.patch_all(subprocess=False, signal=False)
+    _mode = mode
+
+
+def mode():
+    return _mode
+
+
+if __name__ == '__main__':
+    # prints the configured mode, so that the startup script starts uwsgi
+    # the same way the server module sets itself up
+    import os
+    print configured_mode(read_config(
+        os.environ.get('KB_DEPLOYMENT_CONFIG'),
+        os.environ.get('KB_SERVICE_NAME') or 'wjr_count_contigs'))
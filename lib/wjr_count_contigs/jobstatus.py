@@ -0,0 +1,128 @@
+'''
+Answers count_contigs_check with as few job service calls as possible.
+
+Finished job states never change, so they are cached. Concurrent checks of
+the same job share a single call to the job service, and a check may wait
+(long-poll) until the job state changes instead of being repeated by the
+client. A waiting check holds its server thread, so only a few may wait at
+once; the others answer immediately. The caller may pass acquire and release
+functions, which are called around each job service call but not while a
+check sleeps between polls.
+
+The remote KBase job service reports only whether a job has finished, so
+with it a wait ends when the job finishes or the wait runs out. The local
+backend also reports queued -> in-progress.
+'''
+import threading
+import time
+
+from wjr_count_contigs.cache import LRUCache
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class JobStatusTracker(object):
+    '''
+    Arguments:
+    cache_size -- number of finished job states to keep
+    poll_interval -- seconds between job service calls while long-polling
+    max_wait -- upper bound on the wait a caller may ask for
+    max_waiters -- number of callers that may wait at once
+    '''
+
+    def __init__(self, cache_size=10000, poll_interval=1.0, max_wait=30.0,
+                 max_waiters=2):
+        self.poll_interval = float(poll_interval)
+        self.max_wait = float(max_wait)
+        self.max_waiters = int(max_waiters)
+        self._finished = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._waiters = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.waits_declined = 0
+
+    def _fetch(self, key, fetch):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                self.fetches += 1
+                call.result = fetch()
+                if call.result['finished'] != 0:
+                    self._finished.put(key, call.result)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _fetch_holding(self, key, fetch, acquire, release):
+        if acquire is not None:
+            acquire()
+        try:
+            return self._fetch(key, fetch)
+        finally:
+            if release is not None:
+                release()
+
+    def check(self, key, fetch, wait=0, acquire=None, release=None):
+        '''
+        Returns the state of the job identified by key, calling fetch() to
+        ask the job service when it is not cached. If wait is given and the
+        job is unfinished, keeps polling for up to wait seconds (capped at
+        max_wait) until the job's state changes. When max_waiters callers
+        are already waiting, returns the current state without waiting.
+        acquire() and release() are called around every fetch, including
+        a wait for another caller's fetch of the same job.
+        '''
+        state = self._finished.get(key)
+        if state is not None:
+            return state
+        deadline = time.time() + min(max(float(wait or 0), 0), self.max_wait)
+        state = self._fetch_holding(key, fetch, acquire, release)
+        if state['finished'] != 0 or deadline <= time.time():
+            return state
+        with self._lock:
+            if self._waiters >= self.max_waiters:
+                self.waits_declined += 1
+                return state
+            self._waiters += 1
+        try:
+            initial = state.get('job_state')
+            while (state['finished'] == 0 and
+                   state.get('job_state') == initial):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                time.sleep(min(self.poll_interval, remaining))
+                state = self._fetch_holding(key, fetch, acquire, release)
+        finally:
+            with self._lock:
+                self._waiters -= 1
+        return state
+
+    def stats(self):
+        return {'cached': len(self._finished),
+                'fetches': self.fetches,
+                'coalesced': self.coalesced,
+                'waiting': self._waiters,
+                'waits_declined': self.waits_declined}
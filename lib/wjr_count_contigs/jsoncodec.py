@@ -0,0 +1,98 @@
+'''
+JSON encoding and decoding for the server, with a choice of backend.
+
+json-backend in the config picks json (the standard library, the default),
+simplejson or ujson; auto uses simplejson if it is installed and json
+otherwise. Objects a fast backend cannot encode (sets, objects with
+toJSONable) fall back to the standard library with the server's encoder
+class.
+
+simplejson produces the same output as json. ujson is only used when asked
+for by name: it writes floats with at most 15 significant digits where json
+writes enough to read back the same value, so it is not a drop-in
+replacement. Input a fast backend cannot parse, such as integers of 2 ** 64
+and more for ujson, is parsed again by json.
+'''
+import json
+
+BACKENDS = ('ujson', 'simplejson', 'json')
+# tried in this order by auto
+AUTO_BACKENDS = ('simplejson', 'json')
+
+# bring ujson as close to json as it goes: its default is 10 digits and
+# escaped forward slashes, and it parses floats imprecisely
+_DUMPS_OPTIONS = {'ujson': {'double_precision': 15,
+                            'escape_forward_slashes': False}}
+_LOADS_OPTIONS = {'ujson': {'precise_float': True}}
+
+
+def _load_backend(name):
+    if name == 'auto':
+        for candidate in AUTO_BACKENDS:
+            try:
+                return _load_backend(candidate)
+            except ImportError:
+                pass
+    if name not in BACKENDS:
+        raise ValueError('Unknown json-backend: ' + str(name) +
+                         '; expected auto or one of ' + ', '.join(BACKENDS))
+    return name, __import__(name)
+
+
+class JSONCodec(object):
+    '''
+    Arguments:
+    backend -- json, simplejson, ujson or auto
+    encoder_cls -- json.JSONEncoder subclass used by the stdlib fallback
+    chunk_size -- iterencode() yields pieces of about this many bytes
+    '''
+
+    def __init__(self, backend='json', encoder_cls=json.JSONEncoder,
+                 chunk_size=65536):
+        self.name, self._module = _load_backend(backend)
+        self._dumps_options = _DUMPS_OPTIONS.get(self.name, {})
+        self._loads_options = _LOADS_OPTIONS.get(self.name, {})
+        self._encoder = encoder_cls()
+        self.chunk_size = int(chunk_size)
+
+    def loads(self, data):
+        if self.name != 'json':
+            try:
+                return self._module.loads(data, **self._loads_options)
+            except ValueError:
+                # ujson refuses integers of 2 ** 64 and more; let the
+                # standard library decide, and word any real parse error
+                pass
+        return json.loads(data)
+
+    def dumps(self, obj):
+        if self.name != 'json':
+            try:
+                return self._module.dumps(obj, **self._dumps_options)
+            except (TypeError, OverflowError):
+                pass
+        return self._encoder.encode(obj)
+
+    def iterencode(self, obj):
+        '''Encodes obj as a sequence of strings, so a large document is not
+        necessarily held in memory as one string.'''
+        if self.name != 'json':
+            try:
+                return [self._module.dumps(obj, **self._dumps_options)]
+            except (TypeError, OverflowError):
+                pass
+        return self._blocks(self._encoder.iterencode(obj))
+
+    def _blocks(self, pieces):
+        # the stdlib encoder yields many tiny strings; group them
+        buf = []
+        size = 0
+        for piece in pieces:
+            buf.append(piece)
+            size += len(piece)
+            if size >= self.chunk_size:
+                yield ''.join(buf)
+                buf = []
+                size = 0
+        if buf:
+            yield ''.join(buf)
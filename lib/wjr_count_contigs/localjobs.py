@@ -0,0 +1,226 @@
+'''
+Runs async jobs (count_contigs_async) in a local process pool instead of
+sending them to the KBase job service.
+
+Job state is kept as one JSON file per job under a store directory, so that
+any server process sharing the directory can answer check_job, and state
+survives a server restart. Finished jobs are pruned by age and by count.
+'''
+import errno
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+QUEUED = 'queued'
+IN_PROGRESS = 'in-progress'
+COMPLETED = 'completed'
+ERROR = 'error'
+
+
+def _record_path(store_dir, job_id):
+    return os.path.join(store_dir, job_id + '.json')
+
+
+def _read_record(store_dir, job_id):
+    try:
+        with open(_record_path(store_dir, job_id)) as f:
+            return json.load(f)
+    except IOError as e:
+        if e.errno == errno.ENOENT:
+            return None
+        raise
+
+
+def _write_record(store_dir, record):
+    # write then rename so readers never see a partial file
+    path = _record_path(store_dir, record['job_id'])
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(record, f)
+    os.rename(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+def _error(name, message, trace=None):
+    return {'code': 0, 'name': name, 'message': message, 'error': trace}
+
+
+def _execute_job(store_dir, job_id, runner, token):
+    '''Pool worker: runs one job through runner(input, output, token), the
+    same entry point used by the async job script.'''
+    record = None
+    try:
+        record = _read_record(store_dir, job_id)
+        if record is None:
+            # pruned or removed before it started
+            return
+        record['job_state'] = IN_PROGRESS
+        record['pid'] = os.getpid()
+        record['started'] = time.time()
+        _write_record(store_dir, record)
+        input_path = os.path.join(store_dir, job_id + '.input')
+        output_path = os.path.join(store_dir, job_id + '.output')
+        try:
+            with open(input_path, 'w') as f:
+                json.dump(record.pop('request'), f)
+            runner(input_path, output_path, token)
+            with open(output_path) as f:
+                resp = json.load(f)
+            record['result'] = resp.get('result')
+            record['error'] = resp.get('error')
+        except Exception as e:
+            record['error'] = _error('Unexpected Server Error', str(e),
+                                     traceback.format_exc())
+        finally:
+            for path in (input_path, output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        record['job_state'] = ERROR if record.get('error') else COMPLETED
+        record['finished'] = 1
+        record['finish_time'] = time.time()
+        _write_record(store_dir, record)
+    except Exception as e:
+        # the pool would swallow this, and the job would stay in progress
+        # with the pid of a live pool worker forever
+        _fail_job(store_dir, job_id, record, e)
+
+
+def _fail_job(store_dir, job_id, record, exc):
+    trace = traceback.format_exc()
+    sys.stderr.write('Local job %s failed: %s' % (job_id, trace))
+    if record is None:
+        # the record could not be read, so check_job fails for it already
+        return
+    record.pop('request', None)
+    record['job_state'] = ERROR
+    record['finished'] = 1
+    record['finish_time'] = time.time()
+    record['error'] = _error('Unexpected Server Error', str(exc), trace)
+    try:
+        _write_record(store_dir, record)
+    except Exception:
+        # e.g. a full disk: an unknown job is better than one that never ends
+        try:
+            os.remove(_record_path(store_dir, job_id))
+        except OSError:
+            pass
+
+
+class LocalJobRunner(object):
+    '''
+    Arguments:
+    store_dir -- directory holding the job records
+    runner -- module level function(input_path, output_path, token) that
+        runs a JSON-RPC request file and writes the response file
+    processes -- size of the worker pool
+    max_finished -- number of finished jobs to keep
+    max_age -- seconds to keep a finished job
+    prune_interval -- minimum seconds between scans for old jobs
+    '''
+
+    def __init__(self, store_dir, runner, processes=2, max_finished=1000,
+                 max_age=24 * 60 * 60, prune_interval=60):
+        self.store_dir = store_dir
+        self.runner = runner
+        self.processes = int(processes)
+        self.max_finished = int(max_finished)
+        self.max_age = float(max_age)
+        self.prune_interval = float(prune_interval)
+        self._last_prune = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        if not os.path.isdir(store_dir):
+            try:
+                os.makedirs(store_dir)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+    def _get_pool(self):
+        # the pool is created on first use, and again in a forked child
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                import multiprocessing
+                self._pool = multiprocessing.Pool(self.processes)
+                self._pid = os.getpid()
+            return self._pool
+
+    def run_job(self, run_job_params, token, user_id):
+        if time.time() - self._last_prune > self.prune_interval:
+            self.prune()
+        job_id = uuid.uuid4().hex
+        request = {'method': run_job_params['method'],
+                   'params': run_job_params['params'],
+                   'version': '1.1',
+                   'id': job_id}
+        if 'rpc_context' in run_job_params:
+            request['context'] = run_job_params['rpc_context']
+        _write_record(self.store_dir, {
+            'job_id': job_id,
+            'user_id': user_id,
+            'job_state': QUEUED,
+            'finished': 0,
+            'pid': os.getpid(),
+            'submitted': time.time(),
+            'request': request})
+        self._get_pool().apply_async(
+            _execute_job, (self.store_dir, job_id, self.runner, token))
+        return job_id
+
+    def check_job(self, job_id, user_id):
+        record = None
+        if (isinstance(job_id, basestring) and job_id and
+                all(c in '0123456789abcdef' for c in job_id)):
+            record = _read_record(self.store_dir, job_id)
+        if record is None or record.get('user_id') != user_id:
+            raise ValueError('There is no job ' + str(job_id))
+        if not record['finished'] and not _pid_alive(record['pid']):
+            # the process running or holding the job went away
+            record['job_state'] = ERROR
+            record['finished'] = 1
+            record['finish_time'] = time.time()
+            record['error'] = _error('Job interrupted',
+                                     'The job was lost when its server ' +
+                                     'process exited')
+            _write_record(self.store_dir, record)
+        state = {'job_state': record['job_state'],
+                 'finished': record['finished']}
+        if record['finished']:
+            state['result'] = record.get('result')
+            state['error'] = record.get('error')
+        return state
+
+    def prune(self):
+        '''Removes finished jobs beyond max_age or max_finished.'''
+        now = time.time()
+        self._last_prune = now
+        finished = []
+        for name in os.listdir(self.store_dir):
+            if not name.endswith('.json'):
+                continue
+            job_id = name[:-len('.json')]
+            try:
+                record = _read_record(self.store_dir, job_id)
+            except ValueError:
+                continue
+            if record is not None and record['finished']:
+                finished.append((record['finish_time'], job_id))
+        finished.sort(reverse=True)
+        for i, (finish_time, job_id) in enumerate(finished):
+            if i >= self.max_finished or now - finish_time > self.max_age:
+                try:
+                    os.remove(_record_path(self.store_dir, job_id))
+                except OSError:
+                    pass
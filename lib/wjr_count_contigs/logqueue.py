@@ -0,0 +1,242 @@
+'''
+Non-blocking wrapper around biokbase.log loggers.
+
+Log records are put on a bounded in-memory queue and written by a background
+thread in batches, so that a slow log sink (syslog, a file on a busy disk)
+does not add latency to the request path.
+
+The wrapped logger filters by level and stamps the time when a record is
+written, not when it is queued. So changes to the level or the log file go
+through the queue too, and take effect between the same records as they
+would without it. A record written more than LATE_AFTER seconds after it
+was logged is prefixed with the time it was logged.
+'''
+import atexit
+import os
+import threading
+import time
+import Queue
+
+# What to do with a new record when the queue is full
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+LATE_AFTER = 1.0
+
+
+class _Control(object):
+    '''A queued call of a logger method that changes how later records are
+    written.'''
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.done = threading.Event()
+
+    def apply(self, logger):
+        try:
+            getattr(logger, self.name)(*self.args)
+        finally:
+            self.done.set()
+
+
+def _annotate(message, prefix):
+    # prefix is ASCII, so adding it to a unicode message is safe
+    if isinstance(message, basestring):
+        return prefix + message
+    if isinstance(message, list):
+        return [prefix + (m if isinstance(m, basestring) else unicode(m))
+                for m in message]
+    return message
+
+
+class QueuedLog(object):
+    '''
+    Wraps a biokbase.log.log object. log_message() is queued and written
+    asynchronously. set_log_level(), clear_user_log_level() and
+    set_log_file() are queued in order with the records and return once
+    applied; every other attribute is passed straight through to the
+    wrapped logger.
+
+    Arguments:
+    logger -- the biokbase.log.log object that does the actual writing
+    max_queue -- maximum number of pending records
+    batch_size -- maximum number of records written per wakeup
+    flush_interval -- seconds the writer waits for more records
+    overflow -- one of DROP_NEWEST, DROP_OLDEST or BLOCK
+    block_timeout -- with BLOCK, seconds to wait before dropping anyway
+    '''
+
+    def __init__(self, logger, max_queue=10000, batch_size=100,
+                 flush_interval=0.5, overflow=DROP_NEWEST,
+                 block_timeout=1.0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('Unknown log overflow policy: ' + str(overflow) +
+                             '; expected one of ' + ', '.join(OVERFLOW_POLICIES))
+        if int(max_queue) < 1 or int(batch_size) < 1:
+            raise ValueError('Log queue size and batch size must be positive')
+        self._logger = logger
+        self._max_queue = int(max_queue)
+        self._batch_size = int(batch_size)
+        self._flush_interval = float(flush_interval)
+        self._overflow = overflow
+        self._block_timeout = float(block_timeout)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._reset()
+        atexit.register(self.close)
+
+    def _reset(self):
+        # Called on construction and in a forked child, where the parent's
+        # writer thread does not exist.
+        self._queue = Queue.Queue(self._max_queue)
+        self._writer = None
+        self._pid = os.getpid()
+
+    def _writer_alive(self):
+        return self._writer is not None and self._writer.is_alive()
+
+    def _ensure_writer(self):
+        if self._writer_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            # also replaces a writer that has died
+            if not self._writer_alive() and not self._closed:
+                self._writer = threading.Thread(target=self._run,
+                                                name='log-writer')
+                self._writer.daemon = True
+                self._writer.start()
+
+    def log_message(self, level, message, *args, **kwargs):
+        if self._closed:
+            self._logger.log_message(level, message, *args, **kwargs)
+            return
+        self._ensure_writer()
+        record = (time.time(), level, message, args, kwargs)
+        try:
+            if self._overflow == BLOCK:
+                self._queue.put(record, True, self._block_timeout)
+            else:
+                self._queue.put_nowait(record)
+            return
+        except Queue.Full:
+            pass
+        if self._overflow == DROP_OLDEST:
+            try:
+                oldest = self._queue.get_nowait()
+            except Queue.Empty:
+                oldest = None
+            if isinstance(oldest, _Control):
+                # never lose a level change, even if it now comes early
+                oldest.apply(self._logger)
+            elif oldest is not None:
+                self._count_drop()
+            try:
+                self._queue.put_nowait(record)
+                return
+            except Queue.Full:
+                pass
+        self._count_drop()
+
+    def _count_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def _control(self, name, *args):
+        if self._closed or threading.current_thread() is self._writer:
+            return getattr(self._logger, name)(*args)
+        self._ensure_writer()
+        control = _Control(name, args)
+        try:
+            self._queue.put(control, True, self._block_timeout)
+        except Queue.Full:
+            # the writer is stuck; apply it now rather than not at all
+            control.apply(self._logger)
+            return
+        # if the writer is slow the change is still applied, in order, later
+        control.done.wait(self._block_timeout + self._flush_interval)
+
+    def set_log_level(self, level):
+        self._control('set_log_level', level)
+
+    def clear_user_log_level(self):
+        self._control('clear_user_log_level')
+
+    def set_log_file(self, filename):
+        self._control('set_log_file', filename)
+
+    def _take_batch(self, timeout):
+        try:
+            batch = [self._queue.get(True, timeout)]
+        except Queue.Empty:
+            return []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        for record in batch:
+            if isinstance(record, _Control):
+                try:
+                    record.apply(self._logger)
+                except Exception:
+                    self.failed += 1
+                continue
+            try:
+                logged, level, message, args, kwargs = record
+                if time.time() - logged > LATE_AFTER:
+                    message = _annotate(message, '[logged %s.%03d] ' % (
+                        time.strftime('%Y-%m-%d %H:%M:%S',
+                                      time.localtime(logged)),
+                        int(logged * 1000) % 1000))
+                self._logger.log_message(level, message, *args, **kwargs)
+                self.written += 1
+            except Exception:
+                self.failed += 1
+
+    def _run(self):
+        while not self._closed:
+            try:
+                self._write(self._take_batch(self._flush_interval))
+            except Exception:
+                # _write counts failed records itself; whatever else goes
+                # wrong, the writer must keep going
+                pass
+
+    def flush(self, timeout=5.0):
+        '''Writes pending records synchronously, up to timeout seconds.'''
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            batch = self._take_batch(0)
+            if not batch:
+                break
+            self._write(batch)
+
+    def close(self, timeout=5.0):
+        '''Stops the writer thread and flushes any pending records.'''
+        if self._closed:
+            return
+        self._closed = True
+        writer = self._writer
+        if writer is not None and self._pid == os.getpid():
+            writer.join(min(timeout, self._flush_interval + 1))
+        self.flush(timeout)
+
+    def stats(self):
+        return {'queued': self._queue.qsize(),
+                'dropped': self.dropped,
+                'written': self.written,
+                'failed': self.failed}
+
+    def __getattr__(self, name):
+        return getattr(self._logger, name)
@@ -0,0 +1,150 @@
+'''
+Helpers for calling a remote service (the workspace) robustly: bounded
+retries with jittered backoff for idempotent reads, optional hedged duplicate
+calls once a call is slower than a threshold, and a circuit breaker that fails
+fast while the service is unhealthy.
+'''
+import random
+import threading
+import time
+import Queue
+
+import requests as _requests
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_transient(error):
+    '''True for errors worth retrying: no answer, or a gateway error.'''
+    if isinstance(error, (_requests.exceptions.ConnectionError,
+                          _requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, _requests.exceptions.HTTPError):
+        response = error.response
+        return response is not None and response.status_code in (502, 503, 504)
+    return False
+
+
+class CircuitBreaker(object):
+    '''
+    Opens after failure_threshold consecutive transient failures. While open
+    calls fail immediately with CircuitOpenError; after reset_timeout seconds
+    a single trial call is let through, and its outcome closes or re-opens
+    the breaker.
+    '''
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if (time.time() - self._opened_at < self.reset_timeout or
+                    self._trial_running):
+                raise CircuitOpenError(
+                    'The ' + self.name + ' service is unavailable after ' +
+                    'repeated failures; not retrying for ' +
+                    str(self.reset_timeout) + ' seconds')
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if (self._opened_at is not None or
+                    self._failures >= self.failure_threshold):
+                self._opened_at = time.time()
+
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.time() - self._opened_at < self.reset_timeout:
+                return 'open'
+            return 'half-open'
+
+
+def _hedged(fn, hedge_after):
+    '''Runs fn, starting one duplicate if the first call has not returned
+    after hedge_after seconds. Returns the first successful result.'''
+    results = Queue.Queue()
+
+    def run():
+        try:
+            results.put((True, fn()))
+        except Exception as e:
+            results.put((False, e))
+
+    def start():
+        t = threading.Thread(target=run, name='hedged-call')
+        t.daemon = True
+        t.start()
+
+    start()
+    started = 1
+    try:
+        ok, value = results.get(True, hedge_after)
+    except Queue.Empty:
+        start()
+        started += 1
+        ok, value = results.get()
+    first_error = None
+    while True:
+        if ok:
+            return value
+        if first_error is None:
+            first_error = value
+        started -= 1
+        if started == 0:
+            raise first_error
+        ok, value = results.get()
+
+
+def call_with_retries(fn, retries=2, backoff=0.2, max_backoff=2.0,
+                      breaker=None, hedge_after=None):
+    '''
+    Calls fn(), an idempotent read. Transient errors (see is_transient) are
+    retried up to retries times with full-jitter exponential backoff; any
+    other error is raised immediately.
+    '''
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            if hedge_after:
+                result = _hedged(fn, hedge_after)
+            else:
+                result = fn()
+        except Exception as e:
+            if not is_transient(e):
+                # the service answered, so it is healthy
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt >= retries:
+                raise
+            time.sleep(random.uniform(0, min(max_backoff,
+                                             backoff * (2 ** attempt))))
+            attempt += 1
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
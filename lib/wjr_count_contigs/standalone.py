@@ -0,0 +1,392 @@
+'''
+A standalone WSGI server for running the service without uwsgi.
+
+A master process binds the listening socket and forks a number of worker
+processes that all accept on it. Each worker serves requests from a fixed
+pool of threads and keeps HTTP/1.1 connections alive between requests without
+holding a thread for them. On SIGTERM or SIGINT the master stops its workers,
+and each worker stops accepting, finishes the requests it already has and
+exits. Workers that die unexpectedly are restarted.
+'''
+import errno
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+import Queue
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, \
+    ServerHandler
+
+
+class _LimitedInput(object):
+    '''wsgi.input that cannot read past the request body, so the next
+    request on a kept-alive connection is left intact.'''
+
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.read(size) if size else ''
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.readline(size) if size else ''
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        line = self.readline()
+        while line:
+            yield line
+            line = self.readline()
+
+
+def _buffered(rfile):
+    # bytes of the next request that the file object already read from the
+    # socket; select() cannot see them
+    buf = getattr(rfile, '_rbuf', None)
+    return buf is not None and len(buf.getvalue()) > 0
+
+
+class _KeepAliveServerHandler(ServerHandler):
+
+    http_version = '1.1'
+
+    def cleanup_headers(self):
+        ServerHandler.cleanup_headers(self)
+        # without a length the client can only find the end of the body when
+        # the connection closes
+        handler = self.request_handler
+        if ('Content-Length' not in self.headers or
+                handler.close_connection or not handler.server.can_idle()):
+            self.headers['Connection'] = 'close'
+            handler.close_connection = 1
+
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    '''
+    Serves the requests of one connection, one at a time: the server calls
+    handle() whenever the connection has a request waiting, and holds the
+    connection without a thread in between.
+    '''
+
+    protocol_version = 'HTTP/1.1'
+
+    def __init__(self, request, client_address, server):
+        # unlike the base class, do not handle anything yet
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.close_connection = 1
+        self.idle_until = None
+        self.setup()
+
+    def handle(self):
+        self.close_connection = 1
+        # a connection that sends nothing may only hold the thread briefly
+        self.connection.settimeout(self.server.keepalive_timeout)
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except socket.timeout:
+            return
+        if not self.raw_requestline:
+            return
+        self.connection.settimeout(self.server.request_timeout)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            self.close_connection = 1
+            return
+        if not self.parse_request():
+            return
+        env = self.get_environ()
+        try:
+            length = int(env.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        body = _LimitedInput(self.rfile, length)
+        handler = _KeepAliveServerHandler(body, self.wfile,
+                                          self.get_stderr(), env)
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+        if body.remaining:
+            # discard what the application did not read, unless it is large
+            if body.remaining > 1024 * 1024:
+                self.close_connection = 1
+            else:
+                body.read()
+
+    def has_buffered_request(self):
+        return _buffered(self.rfile)
+
+
+class ThreadPoolWSGIServer(WSGIServer):
+    '''
+    WSGIServer that handles requests on a fixed pool of threads. Between
+    requests a kept-alive connection does not hold a thread: it waits in the
+    idle set, which a watcher thread polls with select(), and goes back to
+    the pool when its next request arrives. At most max_idle connections are
+    kept alive; beyond that responses close the connection.
+    '''
+
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, threads=5, keepalive_timeout=5,
+                 request_timeout=300, max_idle=500):
+        WSGIServer.__init__(self, server_address, _KeepAliveHandler)
+        self.threads = int(threads)
+        self.keepalive_timeout = float(keepalive_timeout)
+        self.request_timeout = float(request_timeout)
+        # select() cannot watch descriptors past FD_SETSIZE (1024)
+        self.max_idle = min(int(max_idle), 900)
+        self._connections = None
+        self._new_slots = None
+        self._workers = []
+        self._idle = {}
+        self._idle_lock = threading.Lock()
+        self._wake_r = self._wake_w = None
+        self._watcher = None
+        self._stopping = False
+
+    def start_threads(self):
+        # a new connection waits in the queue until a thread is free; while
+        # threads of them wait, the accept loop blocks, so other worker
+        # processes pick up new clients
+        self._connections = Queue.Queue()
+        self._new_slots = threading.Semaphore(self.threads)
+        self._stopping = False
+        for i in range(self.threads):
+            t = threading.Thread(target=self._work, name='http-%d' % i)
+            t.daemon = True
+            t.start()
+            self._workers.append(t)
+        self._wake_r, self._wake_w = os.pipe()
+        self._watcher = threading.Thread(target=self._watch_idle,
+                                         name='http-idle')
+        self._watcher.daemon = True
+        self._watcher.start()
+
+    def stop_threads(self, timeout=30):
+        '''Lets the threads finish the requests they have, then closes
+        every connection.'''
+        self._stopping = True
+        self._wake()
+        for t in self._workers:
+            self._connections.put(None)
+        deadline = time.time() + timeout
+        for t in self._workers:
+            t.join(max(0, deadline - time.time()))
+        self._workers = []
+        self._watcher.join(max(0, deadline - time.time()))
+        with self._idle_lock:
+            idle, self._idle = self._idle.values(), {}
+        while True:
+            try:
+                handler = self._connections.get_nowait()
+            except Queue.Empty:
+                break
+            if handler is not None:
+                idle.append(handler)
+        for handler in idle:
+            self._close(handler)
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def can_idle(self):
+        with self._idle_lock:
+            return not self._stopping and len(self._idle) < self.max_idle
+
+    def process_request(self, request, client_address):
+        self._new_slots.acquire()
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self._new_slots.release()
+            raise
+        handler.new = True
+        self._connections.put(handler)
+
+    def _work(self):
+        while True:
+            handler = self._connections.get()
+            if handler is None:
+                return
+            if handler.new:
+                handler.new = False
+                self._new_slots.release()
+            try:
+                handler.handle()
+            except Exception:
+                self.handle_error(handler.request, handler.client_address)
+                handler.close_connection = 1
+            if handler.close_connection or self._stopping:
+                self._close(handler)
+            elif handler.has_buffered_request():
+                self._connections.put(handler)
+            else:
+                self._park(handler)
+
+    def _close(self, handler):
+        try:
+            handler.finish()
+        except Exception:
+            pass
+        self.shutdown_request(handler.request)
+
+    def _park(self, handler):
+        handler.idle_until = time.time() + self.keepalive_timeout
+        with self._idle_lock:
+            self._idle[handler.connection.fileno()] = handler
+        self._wake()
+
+    def _wake(self):
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, 'x')
+            except OSError:
+                pass
+
+    def _watch_idle(self):
+        while not self._stopping:
+            with self._idle_lock:
+                fds = self._idle.keys()
+                deadlines = [h.idle_until for h in self._idle.itervalues()]
+            timeout = None
+            if deadlines:
+                timeout = max(0, min(deadlines) - time.time())
+            try:
+                readable = select.select([self._wake_r] + fds, [], [],
+                                         timeout)[0]
+            except (select.error, OSError) as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            if self._wake_r in readable:
+                os.read(self._wake_r, 4096)
+            now = time.time()
+            ready = []
+            expired = []
+            with self._idle_lock:
+                for fd in readable:
+                    if fd in self._idle:
+                        ready.append(self._idle.pop(fd))
+                for fd, handler in self._idle.items():
+                    if handler.idle_until <= now:
+                        expired.append(self._idle.pop(fd))
+            for handler in ready:
+                # data or EOF; handle() closes the connection on EOF
+                self._connections.put(handler)
+            for handler in expired:
+                self._close(handler)
+
+
+def make_server(host, port, app, threads=5, keepalive_timeout=5,
+                max_idle=500):
+    server = ThreadPoolWSGIServer((host, port), threads=threads,
+                                  keepalive_timeout=keepalive_timeout,
+                                  max_idle=max_idle)
+    server.set_app(app)
+    return server
+
+
+def _run_worker(server, worker_id, num_workers, on_worker_start,
+                on_worker_stop, shutdown_timeout):
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return, so it cannot be
+        # called from the thread running it
+        t = threading.Thread(target=server.shutdown)
+        t.daemon = True
+        t.start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server.start_threads()
+    if on_worker_start is not None:
+        on_worker_start(worker_id, num_workers)
+    try:
+        server.serve_forever()
+    finally:
+        server.stop_threads(shutdown_timeout)
+        if on_worker_stop is not None:
+            on_worker_stop()
+
+
+def serve(server, processes=1, on_worker_start=None, on_worker_stop=None,
+          shutdown_timeout=30, on_worker_exit=None):
+    '''
+    Serves until SIGTERM or SIGINT. With one process the server runs in the
+    calling process; otherwise this process becomes the master of processes
+    forked workers. on_worker_start(worker_id, num_workers) is called in each
+    worker before it serves, and on_worker_stop() after its last request.
+    on_worker_exit(pid) is called in the master once a worker has exited,
+    before it is restarted, to clean up after a worker that died.
+    '''
+    processes = int(processes)
+    if processes <= 1:
+        _run_worker(server, 1, 1, on_worker_start, on_worker_stop,
+                    shutdown_timeout)
+        server.server_close()
+        return
+    children = {}
+    stopping = []
+
+    def spawn(worker_id):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(server, worker_id, processes, on_worker_start,
+                            on_worker_stop, shutdown_timeout)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+        children[pid] = worker_id
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for worker_id in range(1, processes + 1):
+        spawn(worker_id)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            if e.errno == errno.ECHILD:
+                break
+            raise
+        worker_id = children.pop(pid, None)
+        if worker_id is not None and on_worker_exit is not None:
+            try:
+                on_worker_exit(pid)
+            except Exception:
+                traceback.print_exc()
+        if worker_id is not None and not stopping:
+            print 'Worker %d (pid %d) exited, restarting' % (worker_id, pid)
+            time.sleep(1)
+            # a stop signal may have arrived while sleeping
+            if not stopping:
+                spawn(worker_id)
+    server.server_close()
@@ -0,0 +1,87 @@
+'''
+Records how long each phase of server startup takes.
+
+The server module calls mark() after each import-time step and wraps lazily
+initialized dependencies in phase(), so report() shows where a cold start
+spends its time. Set KB_STARTUP_REPORT=1 to have the server print the report
+to stderr once it is loaded.
+
+It also implements the readiness file: with several server workers, each
+worker calls worker_ready() once it is warmed up, and the ready file is only
+created when every worker has done so.
+'''
+import errno
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_started = time.time()
+_last = _started
+_phases = []
+
+
+def mark(name):
+    '''Records the time since the previous mark as phase name.'''
+    global _last
+    with _lock:
+        now = time.time()
+        _phases.append((name, now - _last))
+        _last = now
+
+
+@contextmanager
+def phase(name):
+    '''Records the time spent in the with block as phase name.'''
+    began = time.time()
+    try:
+        yield
+    finally:
+        with _lock:
+            _phases.append((name, time.time() - began))
+
+
+def report():
+    with _lock:
+        return {'phases': [{'name': name, 'seconds': round(secs, 4)}
+                           for name, secs in _phases],
+                'import_seconds': round(_last - _started, 4)}
+
+
+def print_report(out=sys.stderr):
+    rep = report()
+    for p in rep['phases']:
+        out.write('startup %-20s %8.4fs\n' % (p['name'], p['seconds']))
+    out.write('startup %-20s %8.4fs\n' % ('total import', rep['import_seconds']))
+
+
+def _ready_dir(ready_file):
+    return ready_file + '.workers'
+
+
+def reset_ready(ready_file):
+    '''Removes the ready file and any worker markers; call before forking.'''
+    ready_dir = _ready_dir(ready_file)
+    if os.path.isdir(ready_dir):
+        for name in os.listdir(ready_dir):
+            os.remove(os.path.join(ready_dir, name))
+    else:
+        os.makedirs(ready_dir)
+    if os.path.exists(ready_file):
+        os.remove(ready_file)
+
+
+def worker_ready(ready_file, worker_id, num_workers):
+    '''Marks a worker as warm, creating ready_file once all workers are.'''
+    ready_dir = _ready_dir(ready_file)
+    try:
+        os.makedirs(ready_dir)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    open(os.path.join(ready_dir, 'worker-%s' % worker_id), 'w').close()
+    if len(os.listdir(ready_dir)) >= num_workers:
+        with open(ready_file, 'w') as f:
+            f.write('%d\n' % num_workers)
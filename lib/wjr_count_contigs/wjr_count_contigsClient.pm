@@ -27,7 +27,8 @@ wjr_count_contigs::wjr_count_contigsClient
 
 
 A KBase module: wjr_count_contigs
-This sample module contains one small method - count_contigs.
+This sample module contains three small methods - count_contigs,
+count_contigs_in_workspace and estimate_distinct_contigs.
 
 
 =cut
@@ -201,6 +202,227 @@ contigset_id - the ContigSet to count.
     }
 }
  
+
+
+=head2 count_contigs_in_workspace
+
+  $return = $obj->count_contigs_in_workspace($workspace_name)
+
+=over 4
+
+=item Parameter and return types
+
+=begin html
+
+<pre>
+$workspace_name is a wjr_count_contigs.workspace_name
+$return is a wjr_count_contigs.WorkspaceContigCounts
+workspace_name is a string
+WorkspaceContigCounts is a reference to a hash where the following keys are defined:
+	workspace_name has a value which is a wjr_count_contigs.workspace_name
+	object_count has a value which is an int
+	total_contig_count has a value which is an int
+	cached_count has a value which is an int
+	error_count has a value which is an int
+	counts has a value which is a reference to a list where each element is a wjr_count_contigs.ObjectContigCount
+ObjectContigCount is a reference to a hash where the following keys are defined:
+	name has a value which is a string
+	ref has a value which is a string
+	contig_count has a value which is an int
+	error has a value which is a string
+
+</pre>
+
+=end html
+
+=begin text
+
+$workspace_name is a wjr_count_contigs.workspace_name
+$return is a wjr_count_contigs.WorkspaceContigCounts
+workspace_name is a string
+WorkspaceContigCounts is a reference to a hash where the following keys are defined:
+	workspace_name has a value which is a wjr_count_contigs.workspace_name
+	object_count has a value which is an int
+	total_contig_count has a value which is an int
+	cached_count has a value which is an int
+	error_count has a value which is an int
+	counts has a value which is a reference to a list where each element is a wjr_count_contigs.ObjectContigCount
+ObjectContigCount is a reference to a hash where the following keys are defined:
+	name has a value which is a string
+	ref has a value which is a string
+	contig_count has a value which is an int
+	error has a value which is a string
+
+
+=end text
+
+=item Description
+
+Count contigs in every ContigSet in a workspace
+workspace_name - the workspace to search.
+
+=back
+
+=cut
+
+ sub count_contigs_in_workspace
+{
+    my($self, @args) = @_;
+
+# Authentication: required
+
+    if ((my $n = @args) != 1)
+    {
+	Bio::KBase::Exceptions::ArgumentValidationError->throw(error =>
+							       "Invalid argument count for function count_contigs_in_workspace (received $n, expecting 1)");
+    }
+    {
+	my($workspace_name) = @args;
+
+	my @_bad_arguments;
+        (!ref($workspace_name)) or push(@_bad_arguments, "Invalid type for argument 1 \"workspace_name\" (value was \"$workspace_name\")");
+        if (@_bad_arguments) {
+	    my $msg = "Invalid arguments passed to count_contigs_in_workspace:\n" . join("", map { "\t$_\n" } @_bad_arguments);
+	    Bio::KBase::Exceptions::ArgumentValidationError->throw(error => $msg,
+								   method_name => 'count_contigs_in_workspace');
+	}
+    }
+
+    my $result = $self->{client}->call($self->{url}, $self->{headers}, {
+	method => "wjr_count_contigs.count_contigs_in_workspace",
+	params => \@args,
+    });
+    if ($result) {
+	if ($result->is_error) {
+	    Bio::KBase::Exceptions::JSONRPC->throw(error => $result->error_message,
+					       code => $result->content->{error}->{code},
+					       method_name => 'count_contigs_in_workspace',
+					       data => $result->content->{error}->{error} # JSON::RPC::ReturnObject only supports JSONRPC 1.1 or 1.O
+					      );
+	} else {
+	    return wantarray ? @{$result->result} : $result->result->[0];
+	}
+    } else {
+        Bio::KBase::Exceptions::HTTP->throw(error => "Error invoking method count_contigs_in_workspace",
+					    status_line => $self->{client}->status_line,
+					    method_name => 'count_contigs_in_workspace',
+				       );
+    }
+}
+ 
+
+
+=head2 estimate_distinct_contigs
+
+  $return = $obj->estimate_distinct_contigs($workspace_name, $contigset_ids)
+
+=over 4
+
+=item Parameter and return types
+
+=begin html
+
+<pre>
+$workspace_name is a wjr_count_contigs.workspace_name
+$contigset_ids is a reference to a list where each element is a wjr_count_contigs.contigset_id
+$return is a wjr_count_contigs.DistinctContigsEstimate
+workspace_name is a string
+contigset_id is a string
+DistinctContigsEstimate is a reference to a hash where the following keys are defined:
+	contigset_count has a value which is an int
+	total_contig_count has a value which is an int
+	distinct_contig_estimate has a value which is an int
+	duplicate_contig_estimate has a value which is an int
+	shared_contig_estimate has a value which is an int
+	per_set has a value which is a reference to a list where each element is a wjr_count_contigs.ContigSetDistinctEstimate
+ContigSetDistinctEstimate is a reference to a hash where the following keys are defined:
+	name has a value which is a string
+	ref has a value which is a string
+	contig_count has a value which is an int
+	distinct_contig_estimate has a value which is an int
+
+</pre>
+
+=end html
+
+=begin text
+
+$workspace_name is a wjr_count_contigs.workspace_name
+$contigset_ids is a reference to a list where each element is a wjr_count_contigs.contigset_id
+$return is a wjr_count_contigs.DistinctContigsEstimate
+workspace_name is a string
+contigset_id is a string
+DistinctContigsEstimate is a reference to a hash where the following keys are defined:
+	contigset_count has a value which is an int
+	total_contig_count has a value which is an int
+	distinct_contig_estimate has a value which is an int
+	duplicate_contig_estimate has a value which is an int
+	shared_contig_estimate has a value which is an int
+	per_set has a value which is a reference to a list where each element is a wjr_count_contigs.ContigSetDistinctEstimate
+ContigSetDistinctEstimate is a reference to a hash where the following keys are defined:
+	name has a value which is a string
+	ref has a value which is a string
+	contig_count has a value which is an int
+	distinct_contig_estimate has a value which is an int
+
+
+=end text
+
+=item Description
+
+Estimate how many unique contigs there are across ContigSets
+contigset_ids - the ContigSets to compare.
+
+=back
+
+=cut
+
+ sub estimate_distinct_contigs
+{
+    my($self, @args) = @_;
+
+# Authentication: required
+
+    if ((my $n = @args) != 2)
+    {
+	Bio::KBase::Exceptions::ArgumentValidationError->throw(error =>
+							       "Invalid argument count for function estimate_distinct_contigs (received $n, expecting 2)");
+    }
+    {
+	my($workspace_name, $contigset_ids) = @args;
+
+	my @_bad_arguments;
+        (!ref($workspace_name)) or push(@_bad_arguments, "Invalid type for argument 1 \"workspace_name\" (value was \"$workspace_name\")");
+        (ref($contigset_ids) eq 'ARRAY') or push(@_bad_arguments, "Invalid type for argument 2 \"contigset_ids\" (value was \"$contigset_ids\")");
+        if (@_bad_arguments) {
+	    my $msg = "Invalid arguments passed to estimate_distinct_contigs:\n" . join("", map { "\t$_\n" } @_bad_arguments);
+	    Bio::KBase::Exceptions::ArgumentValidationError->throw(error => $msg,
+								   method_name => 'estimate_distinct_contigs');
+	}
+    }
+
+    my $result = $self->{client}->call($self->{url}, $self->{headers}, {
+	method => "wjr_count_contigs.estimate_distinct_contigs",
+	params => \@args,
+    });
+    if ($result) {
+	if ($result->is_error) {
+	    Bio::KBase::Exceptions::JSONRPC->throw(error => $result->error_message,
+					       code => $result->content->{error}->{code},
+					       method_name => 'estimate_distinct_contigs',
+					       data => $result->content->{error}->{error} # JSON::RPC::ReturnObject only supports JSONRPC 1.1 or 1.O
+					      );
+	} else {
+	    return wantarray ? @{$result->result} : $result->result->[0];
+	}
+    } else {
+        Bio::KBase::Exceptions::HTTP->throw(error => "Error invoking method estimate_distinct_contigs",
+					    status_line => $self->{client}->status_line,
+					    method_name => 'estimate_distinct_contigs',
+				       );
+    }
+}
+ 
   
 
 sub version {
@@ -352,6 +574,189 @@ contig_count has a value which is an int
 
 
 
+=head2 ObjectContigCount
+
+=over 4
+
+
+
+=item Description
+
+The contig count of one ContigSet in a workspace.
+ref - the ContigSet's reference, including its version.
+error - why the ContigSet could not be counted, for example because it
+    was deleted after it was listed; contig_count is then left out.
+
+
+=item Definition
+
+=begin html
+
+<pre>
+a reference to a hash where the following keys are defined:
+name has a value which is a string
+ref has a value which is a string
+contig_count has a value which is an int
+error has a value which is a string
+
+</pre>
+
+=end html
+
+=begin text
+
+a reference to a hash where the following keys are defined:
+name has a value which is a string
+ref has a value which is a string
+contig_count has a value which is an int
+error has a value which is a string
+
+
+=end text
+
+=back
+
+
+
+=head2 WorkspaceContigCounts
+
+=over 4
+
+
+
+=item Description
+
+cached_count - how many of the counts were reused from earlier calls.
+error_count - how many ContigSets could not be counted; they are left
+    out of total_contig_count.
+
+
+=item Definition
+
+=begin html
+
+<pre>
+a reference to a hash where the following keys are defined:
+workspace_name has a value which is a wjr_count_contigs.workspace_name
+object_count has a value which is an int
+total_contig_count has a value which is an int
+cached_count has a value which is an int
+error_count has a value which is an int
+counts has a value which is a reference to a list where each element is a wjr_count_contigs.ObjectContigCount
+
+</pre>
+
+=end html
+
+=begin text
+
+a reference to a hash where the following keys are defined:
+workspace_name has a value which is a wjr_count_contigs.workspace_name
+object_count has a value which is an int
+total_contig_count has a value which is an int
+cached_count has a value which is an int
+error_count has a value which is an int
+counts has a value which is a reference to a list where each element is a wjr_count_contigs.ObjectContigCount
+
+
+=end text
+
+=back
+
+
+
+=head2 ContigSetDistinctEstimate
+
+=over 4
+
+
+
+=item Description
+
+The contig count and estimated distinct contig count of one ContigSet.
+
+
+=item Definition
+
+=begin html
+
+<pre>
+a reference to a hash where the following keys are defined:
+name has a value which is a string
+ref has a value which is a string
+contig_count has a value which is an int
+distinct_contig_estimate has a value which is an int
+
+</pre>
+
+=end html
+
+=begin text
+
+a reference to a hash where the following keys are defined:
+name has a value which is a string
+ref has a value which is a string
+contig_count has a value which is an int
+distinct_contig_estimate has a value which is an int
+
+
+=end text
+
+=back
+
+
+
+=head2 DistinctContigsEstimate
+
+=over 4
+
+
+
+=item Description
+
+Estimates from HyperLogLog sketches of the contigs' md5 checksums.
+Contigs without an md5 cannot be compared and are counted as distinct,
+and a ContigSet listed more than once is counted once.
+distinct_contig_estimate - distinct contigs across all the ContigSets.
+duplicate_contig_estimate - total_contig_count minus the distinct count.
+shared_contig_estimate - distinct contigs counted in more than one
+    ContigSet, summed over the extra ContigSets they appear in.
+
+
+=item Definition
+
+=begin html
+
+<pre>
+a reference to a hash where the following keys are defined:
+contigset_count has a value which is an int
+total_contig_count has a value which is an int
+distinct_contig_estimate has a value which is an int
+duplicate_contig_estimate has a value which is an int
+shared_contig_estimate has a value which is an int
+per_set has a value which is a reference to a list where each element is a wjr_count_contigs.ContigSetDistinctEstimate
+
+</pre>
+
+=end html
+
+=begin text
+
+a reference to a hash where the following keys are defined:
+contigset_count has a value which is an int
+total_contig_count has a value which is an int
+distinct_contig_estimate has a value which is an int
+duplicate_contig_estimate has a value which is an int
+shared_contig_estimate has a value which is an int
+per_set has a value which is a reference to a list where each element is a wjr_count_contigs.ContigSetDistinctEstimate
+
+
+=end text
+
+=back
+
+
+
 =cut
 
 package wjr_count_contigs::wjr_count_contigsClient::RpcClient;
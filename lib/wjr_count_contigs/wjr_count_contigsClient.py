@@ -18,9 +18,13 @@ import random as _random
 import base64 as _base64
 from ConfigParser import ConfigParser as _ConfigParser
 import os as _os
+import zlib as _zlib
 
 _CT = 'content-type'
 _AJ = 'application/json'
+_NDJSON = 'application/x-ndjson'
+# request bodies at least this large are sent gzip compressed
+_COMPRESS_MIN_SIZE = 1024
 _URL_SCHEME = frozenset(['http', 'https'])
 
 
@@ -107,7 +111,7 @@ class wjr_count_contigs(object):
 
     def __init__(self, url=None, timeout=30 * 60, user_id=None,
                  password=None, token=None, ignore_authrc=False,
-                 trust_all_ssl_certificates=False):
+                 trust_all_ssl_certificates=False, compress_requests=True):
         if url is None:
             raise ValueError('A url is required')
         scheme, _, _, _, _, _ = _urlparse.urlparse(url)
@@ -117,6 +121,7 @@ class wjr_count_contigs(object):
         self.timeout = int(timeout)
         self._headers = dict()
         self.trust_all_ssl_certificates = trust_all_ssl_certificates
+        self.compress_requests = compress_requests
         # token overrides user_id and password
         if token is not None:
             self._headers['AUTHORIZATION'] = token
@@ -147,11 +152,13 @@ class wjr_count_contigs(object):
         if json_rpc_context:
             arg_hash['context'] = json_rpc_context
 
-        body = _json.dumps(arg_hash, cls=_JSONObjectEncoder)
-        ret = _requests.post(self.url, data=body, headers=self._headers,
+        body, headers = self._encode_body(
+            _json.dumps(arg_hash, cls=_JSONObjectEncoder), self._headers)
+        ret = _requests.post(self.url, data=body, headers=headers,
                              timeout=self.timeout,
                              verify=not self.trust_all_ssl_certificates)
-        if ret.status_code == _requests.codes.server_error:
+        if ret.status_code in (_requests.codes.server_error,
+                               _requests.codes.service_unavailable):
             json_header = None
             if _CT in ret.headers:
                 json_header = ret.headers[_CT]
@@ -177,4 +184,80 @@ class wjr_count_contigs(object):
         resp = self._call('wjr_count_contigs.count_contigs',
                           [workspace_name, contigset_id], json_rpc_context)
         return resp[0]
- 
\ No newline at end of file
+
+    def count_contigs_in_workspace(self, workspace_name, json_rpc_context = None):
+        if json_rpc_context and type(json_rpc_context) is not dict:
+            raise ValueError('Method count_contigs_in_workspace: argument json_rpc_context is not type dict as required.')
+        resp = self._call('wjr_count_contigs.count_contigs_in_workspace',
+                          [workspace_name], json_rpc_context)
+        return resp[0]
+
+    def estimate_distinct_contigs(self, workspace_name, contigset_ids, json_rpc_context = None):
+        if json_rpc_context and type(json_rpc_context) is not dict:
+            raise ValueError('Method estimate_distinct_contigs: argument json_rpc_context is not type dict as required.')
+        resp = self._call('wjr_count_contigs.estimate_distinct_contigs',
+                          [workspace_name, contigset_ids], json_rpc_context)
+        return resp[0]
+
+    def count_contigs_stream(self, workspace_and_contigset_ids,
+                             json_rpc_context = None):
+        """
+        Counts many ContigSets in one batch request. Takes an iterable of
+        (workspace_name, contigset_id) pairs and returns an iterator that
+        yields each count as soon as the server has it, in request order.
+        A call that failed yields a ServerError instead of raising, so one bad
+        ContigSet does not end the iteration.
+        """
+        if json_rpc_context and type(json_rpc_context) is not dict:
+            raise ValueError('Method count_contigs_stream: argument json_rpc_context is not type dict as required.')
+        batch = []
+        for i, (workspace_name, contigset_id) in enumerate(
+                workspace_and_contigset_ids):
+            arg_hash = {'method': 'wjr_count_contigs.count_contigs',
+                        'params': [workspace_name, contigset_id],
+                        'version': '1.1',
+                        'id': str(i)}
+            if json_rpc_context:
+                arg_hash['context'] = json_rpc_context
+            batch.append(arg_hash)
+        body, headers = self._encode_body(
+            _json.dumps(batch, cls=_JSONObjectEncoder), self._headers)
+        headers['Accept'] = _NDJSON
+        ret = _requests.post(self.url, data=body, headers=headers, timeout=self.timeout, stream=True,
+                             verify=not self.trust_all_ssl_certificates)
+        if ret.status_code != _requests.codes.OK:
+            self._raise_error(ret)
+        return self._iter_stream(ret)
+
+    def _encode_body(self, body, headers):
+        # responses are decompressed by requests, which already sends
+        # Accept-Encoding: gzip
+        headers = dict(headers)
+        if self.compress_requests and len(body) >= _COMPRESS_MIN_SIZE:
+            c = _zlib.compressobj(6, _zlib.DEFLATED, 16 + _zlib.MAX_WBITS)
+            body = c.compress(body) + c.flush()
+            headers['Content-Encoding'] = 'gzip'
+        return body, headers
+
+    def _raise_error(self, ret):
+        if _CT in ret.headers and ret.headers[_CT] == _AJ:
+            err = _json.loads(ret.text)
+            if 'error' in err:
+                raise ServerError(**err['error'])
+        if ret.status_code in (_requests.codes.server_error,
+                               _requests.codes.service_unavailable):
+            raise ServerError('Unknown', 0, ret.text)
+        ret.raise_for_status()
+
+    def _iter_stream(self, ret):
+        try:
+            for line in ret.iter_lines():
+                if not line:
+                    continue
+                resp = _json.loads(line)
+                if 'error' in resp:
+                    yield ServerError(**resp['error'])
+                else:
+                    yield resp['result'][0]
+        finally:
+            ret.close()
@@ -1,5 +1,10 @@
 #BEGIN_HEADER
 from biokbase.workspace.client import Workspace as workspaceService
+from wjr_count_contigs.resilience import CircuitBreaker, call_with_retries
+from wjr_count_contigs.cache import LRUCache
+from wjr_count_contigs.sketch import HyperLogLog
+
+CONTIGSET_TYPE = 'KBaseGenomes.ContigSet'
 #END_HEADER
 
 
@@ -10,7 +15,8 @@ class wjr_count_contigs:
 
     Module Description:
     A KBase module: wjr_count_contigs
-This sample module contains one small method - count_contigs.
+This sample module contains three small methods - count_contigs,
+count_contigs_in_workspace and estimate_distinct_contigs.
     '''
 
     ######## WARNING FOR GEVENT USERS #######
@@ -20,7 +26,101 @@ This sample module contains one small method - count_contigs.
     # the latter method is running.
     #########################################
     #BEGIN_CLASS_HEADER
+    # Everything set in the constructor is read-only afterwards, and all
+    # per-call state lives in the ctx argument, so calls cannot clobber each
+    # other under gevent. The circuit breaker is shared on purpose and locks.
     workspaceURL = None
+
+    def _ws_read(self, token, method, params):
+        # only reads go through here, so it is safe to retry and to hedge
+        wsClient = workspaceService(self.workspaceURL, token=token,
+                                    timeout=self.workspaceTimeout)
+        return call_with_retries(
+            lambda: getattr(wsClient, method)(params),
+            retries=self.workspaceRetries,
+            backoff=self.workspaceRetryBackoff,
+            breaker=self.workspaceBreaker,
+            hedge_after=self.workspaceHedgeAfter)
+
+    def _get_objects(self, token, object_specs):
+        return self._ws_read(token, 'get_objects', object_specs)
+
+    def _list_contigsets(self, token, workspace_name):
+        # page through the listing by object id
+        infos = []
+        min_id = 1
+        while True:
+            page = self._ws_read(token, 'list_objects', {
+                'workspaces': [workspace_name],
+                'type': CONTIGSET_TYPE,
+                'minObjectID': min_id,
+                'limit': self.listPageSize})
+            infos.extend(page)
+            if len(page) < self.listPageSize:
+                return infos
+            min_id = max(info[0] for info in page) + 1
+
+    def _object_ref(self, info):
+        return '%d/%d/%d' % (info[6], info[0], info[4])
+
+    def _count_object(self, token, info):
+        # versions are immutable, so a count keyed by the full reference
+        # never goes stale; the listing has already checked access
+        ref = self._object_ref(info)
+        count = self.countCache.get(ref)
+        cached = count is not None
+        if not cached:
+            data = self._ws_read(token, 'get_object_subset', [
+                {'ref': ref, 'included': ['contigs/[*]/id']}])[0]['data']
+            count = len(data.get('contigs', []))
+            self.countCache.put(ref, count)
+        return {'name': info[1], 'ref': ref, 'contig_count': count}, cached
+
+    def _sketch_object(self, token, info):
+        # Sketches are much larger than counts, so they have their own
+        # cache. A contig without an md5 cannot be compared with others and
+        # is counted separately, as a distinct contig.
+        ref = self._object_ref(info)
+        summary = self.sketchCache.get(ref)
+        cached = summary is not None
+        if not cached:
+            data = self._ws_read(token, 'get_object_subset', [
+                {'ref': ref, 'included': ['contigs/[*]/md5']}])[0]['data']
+            contigs = data.get('contigs', [])
+            sketch = HyperLogLog(self.sketchPrecision)
+            unsketched = 0
+            for contig in contigs:
+                if contig.get('md5'):
+                    sketch.add(contig['md5'].encode('utf-8'))
+                else:
+                    unsketched += 1
+            summary = (len(contigs), unsketched, sketch.to_bytes())
+            self.sketchCache.put(ref, summary)
+            self.countCache.put(ref, len(contigs))
+        return {'name': info[1], 'ref': ref, 'contig_count': summary[0],
+                'unsketched': summary[1], 'sketch': summary[2]}, cached
+
+    def _map_objects(self, summarize, token, infos):
+        # Returns (summary, cached, error) for each object. An object may be
+        # deleted or made unreadable after it was listed, so one failure
+        # does not stop the others; summary is then None.
+        # imported here to keep it out of the server's startup path
+        from multiprocessing.pool import ThreadPool
+        if not infos:
+            return []
+
+        def summarize_one(info):
+            try:
+                summary, cached = summarize(token, info)
+                return summary, cached, None
+            except Exception as e:
+                return None, False, e
+        pool = ThreadPool(min(self.countConcurrency, len(infos)))
+        try:
+            return pool.map(summarize_one, infos)
+        finally:
+            pool.close()
+            pool.join()
     #END_CLASS_HEADER
 
     # config contains contents of config file in a hash or None if it couldn't
@@ -28,6 +128,23 @@ This sample module contains one small method - count_contigs.
     def __init__(self, config):
         #BEGIN_CONSTRUCTOR
         self.workspaceURL = config['workspace-url']
+        self.workspaceTimeout = int(config.get('workspace-timeout', 60))
+        self.workspaceRetries = int(config.get('workspace-retries', 2))
+        self.workspaceRetryBackoff = float(
+            config.get('workspace-retry-backoff', 0.2))
+        # 0 disables hedged requests
+        self.workspaceHedgeAfter = float(
+            config.get('workspace-hedge-after', 0)) or None
+        self.workspaceBreaker = CircuitBreaker(
+            'workspace',
+            failure_threshold=config.get('workspace-breaker-threshold', 5),
+            reset_timeout=config.get('workspace-breaker-reset', 30))
+        self.listPageSize = int(config.get('workspace-list-page-size', 1000))
+        self.countConcurrency = int(
+            config.get('workspace-count-concurrency', 8))
+        self.countCache = LRUCache(int(config.get('count-cache-size', 10000)))
+        self.sketchCache = LRUCache(int(config.get('sketch-cache-size', 1000)))
+        self.sketchPrecision = int(config.get('sketch-precision', 12))
         #END_CONSTRUCTOR
         pass
 
@@ -36,8 +153,7 @@ This sample module contains one small method - count_contigs.
         # return variables are: returnVal
         #BEGIN count_contigs
         token = ctx['token']
-        wsClient = workspaceService(self.workspaceURL, token=token)
-        contigSet = wsClient.get_objects([{'ref': workspace_name+'/'+contigset_id}])[0]['data']
+        contigSet = self._get_objects(token, [{'ref': workspace_name+'/'+contigset_id}])[0]['data']
         provenance = None
         if 'provenance' in ctx:
             provenance = ctx['provenance']
@@ -50,3 +166,89 @@ This sample module contains one small method - count_contigs.
                              'returnVal is not type dict as required.')
         # return the results
         return [returnVal]
+
+    def count_contigs_in_workspace(self, ctx, workspace_name):
+        # ctx is the context object
+        # return variables are: returnVal
+        #BEGIN count_contigs_in_workspace
+        token = ctx['token']
+        infos = self._list_contigsets(token, workspace_name)
+        counts = []
+        cached_count = 0
+        error_count = 0
+        results = self._map_objects(self._count_object, token, infos)
+        for info, (summary, cached, error) in zip(infos, results):
+            if error is not None:
+                summary = {'name': info[1], 'ref': self._object_ref(info),
+                           'error': str(error)}
+                error_count += 1
+            counts.append(summary)
+            if cached:
+                cached_count += 1
+        returnVal = {'workspace_name': workspace_name,
+                     'object_count': len(counts),
+                     'total_contig_count': sum(c.get('contig_count', 0)
+                                               for c in counts),
+                     'cached_count': cached_count,
+                     'error_count': error_count,
+                     'counts': counts}
+        #END count_contigs_in_workspace
+
+        # At some point might do deeper type checking...
+        if not isinstance(returnVal, dict):
+            raise ValueError('Method count_contigs_in_workspace return value ' +
+                             'returnVal is not type dict as required.')
+        # return the results
+        return [returnVal]
+
+    def estimate_distinct_contigs(self, ctx, workspace_name, contigset_ids):
+        # ctx is the context object
+        # return variables are: returnVal
+        #BEGIN estimate_distinct_contigs
+        token = ctx['token']
+        # resolve names to versioned references, which also checks access
+        infos = []
+        if contigset_ids:
+            infos = self._ws_read(token, 'get_object_info_new', {
+                'objects': [{'ref': workspace_name + '/' + contigset_id}
+                            for contigset_id in contigset_ids]})
+        # the same ContigSet may be named more than once, or by name and id
+        unique = {}
+        for info in infos:
+            unique.setdefault(self._object_ref(info), info)
+        infos = [info for info in infos
+                 if unique[self._object_ref(info)] is info]
+        per_set = []
+        sketches = []
+        unsketched = 0
+        for summary, cached, error in self._map_objects(self._sketch_object,
+                                                        token, infos):
+            # the estimates need every ContigSet that was asked for
+            if error is not None:
+                raise error
+            sketch = HyperLogLog.from_bytes(summary.pop('sketch'))
+            summary['distinct_contig_estimate'] = (sketch.estimate() +
+                                                   summary['unsketched'])
+            unsketched += summary.pop('unsketched')
+            per_set.append(summary)
+            sketches.append(sketch)
+        total = sum(s['contig_count'] for s in per_set)
+        distinct = unsketched + HyperLogLog.union(
+            sketches, self.sketchPrecision).estimate()
+        returnVal = {
+            'contigset_count': len(per_set),
+            'total_contig_count': total,
+            'distinct_contig_estimate': distinct,
+            'duplicate_contig_estimate': max(0, total - distinct),
+            'shared_contig_estimate': max(
+                0, sum(s['distinct_contig_estimate'] for s in per_set) -
+                distinct),
+            'per_set': per_set}
+        #END estimate_distinct_contigs
+
+        # At some point might do deeper type checking...
+        if not isinstance(returnVal, dict):
+            raise ValueError('Method estimate_distinct_contigs return value ' +
+                             'returnVal is not type dict as required.')
+        # return the results
+        return [returnVal]
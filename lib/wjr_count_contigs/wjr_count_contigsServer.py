@@ -1,24 +1,33 @@
 #!/usr/bin/env python
-from wsgiref.simple_server import make_server
+# The execution mode may patch the standard library for gevent, which has to
+# happen before anything else is imported. This is also the only place the
+# config file is read.
+from os import environ
+from wjr_count_contigs import execution
+_config = execution.read_config(
+    environ.get('KB_DEPLOYMENT_CONFIG'),
+    environ.get('KB_SERVICE_NAME') or 'wjr_count_contigs')
+execution.setup(execution.configured_mode(_config))
+from wjr_count_contigs import startup
 import sys
 import json
+import threading
 import traceback
 import datetime
-from multiprocessing import Process
+import itertools
 from getopt import getopt, GetoptError
 from jsonrpcbase import JSONRPCService, InvalidParamsError, KeywordError,\
     JSONRPCError, ServerError, InvalidRequestError
-from os import environ
-from ConfigParser import ConfigParser
 from biokbase import log
-import biokbase.nexus
 import requests as _requests
 import urlparse as _urlparse
 import random as _random
 import os
+startup.mark('imports')
 
 DEPLOY = 'KB_DEPLOYMENT_CONFIG'
 SERVICE = 'KB_SERVICE_NAME'
+NDJSON = 'application/x-ndjson'
 
 # Note that the error fields do not match the 2.0 JSONRPC spec
 
@@ -31,19 +40,15 @@ def get_service_name():
 
 
 def get_config():
-    if not get_config_file():
-        return None
-    retconfig = {}
-    config = ConfigParser()
-    config.read(get_config_file())
-    for nameval in config.items(get_service_name() or 'wjr_count_contigs'):
-        retconfig[nameval[0]] = nameval[1]
-    return retconfig
+    return execution.read_config(get_config_file(),
+                                 get_service_name() or 'wjr_count_contigs')
 
-config = get_config()
+config = _config
+startup.mark('config')
 
 from wjr_count_contigs.wjr_count_contigsImpl import wjr_count_contigs
 impl_wjr_count_contigs = wjr_count_contigs(config)
+startup.mark('impl')
 
 
 class JSONObjectEncoder(json.JSONEncoder):
@@ -57,12 +62,97 @@ class JSONObjectEncoder(json.JSONEncoder):
             return obj.toJSONable()
         return json.JSONEncoder.default(self, obj)
 
+_json_codec = None
+
+
+def get_json_codec():
+    '''The codec for requests and responses, built on first use so that an
+    async job, which does not need it, does not import its backend.'''
+    global _json_codec
+    if _json_codec is None:
+        from wjr_count_contigs.jsoncodec import JSONCodec
+        cfg = config or {}
+        _json_codec = JSONCodec(backend=cfg.get('json-backend', 'json'),
+                                encoder_cls=JSONObjectEncoder,
+                                chunk_size=cfg.get('response-chunk-size',
+                                                   65536))
+    return _json_codec
+
+
+def read_request_body(stream, size, chunk_size=65536):
+    '''Reads size bytes from stream in chunks, stopping early at EOF.'''
+    chunks = []
+    while size > 0:
+        chunk = stream.read(min(size, chunk_size))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+def buffer_response(result, limit):
+    '''
+    Returns (body iterable, length) for an rpc result, which is either a
+    string or an iterable of strings. Results up to limit bytes are joined
+    so that their length is known; longer ones are streamed and the length
+    is None. An error while encoding a streamed result can no longer become
+    an error response: the status has been sent, so the body just ends
+    early and the client fails to parse it.
+    '''
+    if isinstance(result, basestring):
+        return [result], len(result)
+    chunks = iter(result)
+    buf = []
+    size = 0
+    for chunk in chunks:
+        buf.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return ClosingIterator(itertools.chain(buf, chunks),
+                                   getattr(result, 'close', None)), None
+    body = ''.join(buf)
+    close = getattr(result, 'close', None)
+    if close is not None:
+        close()
+    return [body], len(body)
+
+
+class ClosingIterator(object):
+    '''
+    A WSGI response iterable over chunks that calls on_close, once, when the
+    server closes it. Unlike a generator's finally clause this also runs if
+    the body was never iterated, e.g. because the client went away.
+    '''
+
+    def __init__(self, chunks, on_close=None):
+        self._chunks = iter(chunks)
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return next(self._chunks)
+
+    def close(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
 sync_methods = {}
 async_run_methods = {}
 async_check_methods = {}
 async_run_methods['wjr_count_contigs.count_contigs_async'] = ['wjr_count_contigs', 'count_contigs']
 async_check_methods['wjr_count_contigs.count_contigs_check'] = ['wjr_count_contigs', 'count_contigs']
 sync_methods['wjr_count_contigs.count_contigs'] = True
+async_run_methods['wjr_count_contigs.count_contigs_in_workspace_async'] = ['wjr_count_contigs', 'count_contigs_in_workspace']
+async_check_methods['wjr_count_contigs.count_contigs_in_workspace_check'] = ['wjr_count_contigs', 'count_contigs_in_workspace']
+sync_methods['wjr_count_contigs.count_contigs_in_workspace'] = True
+async_run_methods['wjr_count_contigs.estimate_distinct_contigs_async'] = ['wjr_count_contigs', 'estimate_distinct_contigs']
+async_check_methods['wjr_count_contigs.estimate_distinct_contigs_check'] = ['wjr_count_contigs', 'estimate_distinct_contigs']
+sync_methods['wjr_count_contigs.estimate_distinct_contigs'] = True
+sync_methods['wjr_count_contigs.status'] = True
 
 class AsyncJobServiceClient(object):
 
@@ -122,6 +212,54 @@ class AsyncJobServiceClient(object):
         return self._call('KBaseJobService.check_job', [job_id], json_rpc_call_context)[0]
 
 
+_local_job_runner = None
+
+
+def get_local_job_runner():
+    global _local_job_runner
+    if _local_job_runner is None:
+        if execution.mode() == execution.GEVENT:
+            raise ValueError('job-backend = local cannot be used with ' +
+                             'execution-mode = gevent')
+        from wjr_count_contigs.localjobs import LocalJobRunner
+        cfg = config or {}
+        store_dir = cfg.get('local-job-dir') or os.path.join(
+            cfg.get('scratch', '/kb/module/work/tmp'), 'local_jobs')
+        _local_job_runner = LocalJobRunner(
+            store_dir, process_async_cli,
+            processes=cfg.get('local-job-processes', 1),
+            max_finished=cfg.get('local-job-max-finished', 1000),
+            max_age=cfg.get('local-job-max-age', 24 * 60 * 60))
+    return _local_job_runner
+
+
+class LocalJobServiceClient(object):
+    '''Same interface as AsyncJobServiceClient, but runs jobs in a local
+    process pool; selected with job-backend = local in the config.'''
+
+    def __init__(self, token=None, user_id=None):
+        if token is None:
+            raise ValueError('Authentication is required for async methods')
+        self.token = token
+        self.user_id = user_id
+
+    def run_job(self, run_job_params, json_rpc_call_context = None):
+        return get_local_job_runner().run_job(run_job_params, self.token,
+                                              self.user_id)
+
+    def check_job(self, job_id, json_rpc_call_context = None):
+        return get_local_job_runner().check_job(job_id, self.user_id)
+
+
+def get_job_service_client(ctx):
+    backend = (config or {}).get('job-backend', 'remote')
+    if backend == 'local':
+        return LocalJobServiceClient(token=ctx['token'], user_id=ctx['user_id'])
+    if backend != 'remote':
+        raise ValueError('Unknown job-backend: ' + backend)
+    return AsyncJobServiceClient(token=ctx['token'])
+
+
 class JSONRPCServiceCustom(JSONRPCService):
 
     def call(self, ctx, jsondata):
@@ -138,6 +276,17 @@ class JSONRPCServiceCustom(JSONRPCService):
 
         return None
 
+    def call_iter(self, ctx, jsondata):
+        """
+        Like call(), but returns the JSON as an iterable of strings, so that
+        a large result does not have to be encoded into a single string.
+        """
+        result = self.call_py(ctx, jsondata)
+        if result is not None:
+            return get_json_codec().iterencode(result)
+
+        return None
+
     def _call_method(self, ctx, request):
         """Calls given method with given params and returns it value."""
         method = self.method_data[request['method']]['method']
@@ -262,7 +411,21 @@ class MethodContext(dict):
         self['rpc_context'] = None
         self['provenance'] = None
         self._debug_levels = set([7, 8, 9, 'DEBUG', 'DEBUG2', 'DEBUG3'])
-        self._logger = logger
+        # None means the application's user log, built on first use
+        self._given_logger = logger
+        self.user_lookup = None
+
+    @property
+    def _logger(self):
+        return self._given_logger or application.userlog
+
+    def __missing__(self, key):
+        # user_id is left out of an async job's context and looked up from
+        # the token only if something reads it
+        if key == 'user_id' and self.user_lookup is not None:
+            self['user_id'] = self.user_lookup()
+            return self['user_id']
+        raise KeyError(key)
 
     def log_err(self, message):
         self._log(log.ERR, message)
@@ -309,46 +472,160 @@ def getIPAddress(environ):
     return environ.get('REMOTE_ADDR')
 
 
+def queue_log(logger):
+    '''Wraps a biokbase logger so writes happen off the request path, unless
+    disabled with log-async = false in the config.'''
+    cfg = config or {}
+    if cfg.get('log-async', 'true') != 'true':
+        return logger
+    from wjr_count_contigs.logqueue import QueuedLog
+    return QueuedLog(logger,
+                     max_queue=int(cfg.get('log-queue-size', 10000)),
+                     batch_size=int(cfg.get('log-batch-size', 100)),
+                     flush_interval=float(cfg.get('log-flush-interval', 0.5)),
+                     overflow=cfg.get('log-overflow-policy', 'drop_newest'))
+
+
 class Application(object):
     # Wrap the wsgi handler in a class definition so that we can
     # do some initialization and avoid regenerating stuff over
     # and over
 
     def logcallback(self):
-        self.serverlog.set_log_file(self.userlog.get_log_file())
+        if self._serverlog is not None:
+            self._serverlog.set_log_file(self.userlog.get_log_file())
 
     def log(self, level, context, message):
         self.serverlog.log_message(level, message, context['client_ip'],
                                    context['user_id'], context['module'],
                                    context['method'], context['call_id'])
 
+    # The loggers, the auth client and the request handling helpers are
+    # created on first use, so that a one-shot async job does not pay for
+    # what it never touches.
+
+    @property
+    def userlog(self):
+        if self._userlog is None:
+            with self._init_lock:
+                if self._userlog is None:
+                    with startup.phase('userlog'):
+                        self._userlog = queue_log(log.log(
+                            self._submod, ip_address=True, authuser=True,
+                            module=True, method=True, call_id=True,
+                            changecallback=self.logcallback,
+                            config=get_config_file()))
+        return self._userlog
+
+    @property
+    def serverlog(self):
+        if self._serverlog is None:
+            with self._init_lock:
+                if self._serverlog is None:
+                    with startup.phase('serverlog'):
+                        serverlog = queue_log(log.log(
+                            self._submod, ip_address=True, authuser=True,
+                            module=True, method=True, call_id=True,
+                            logfile=self.userlog.get_log_file()))
+                        serverlog.set_log_level(6)
+                        self._serverlog = serverlog
+        return self._serverlog
+
+    @property
+    def auth_client(self):
+        if self._auth_client is None:
+            with self._init_lock:
+                if self._auth_client is None:
+                    with startup.phase('auth_client'):
+                        import biokbase.nexus
+                        self._auth_client = biokbase.nexus.Client(
+                            config={'server': 'nexus.api.globusonline.org',
+                                    'verify_ssl': True,
+                                    'client': None,
+                                    'client_secret': None})
+        return self._auth_client
+
+    @property
+    def admission(self):
+        # Its counters are shared with the processes forked after it is
+        # built, so a pre-forking server must build it first; see preload().
+        if self._admission is None:
+            with self._init_lock:
+                if self._admission is None:
+                    from wjr_count_contigs.admission import \
+                        AdmissionController
+                    cfg = config or {}
+                    self._admission = AdmissionController(
+                        max_active=cfg.get('max-concurrent-requests', 20),
+                        max_active_per_user=cfg.get(
+                            'max-concurrent-requests-per-user', 5),
+                        max_waiting=cfg.get('max-queued-requests', 3),
+                        max_wait=cfg.get('max-queue-wait', 2))
+        return self._admission
+
+    @admission.setter
+    def admission(self, controller):
+        self._admission = controller
+
+    @property
+    def job_status(self):
+        if self._job_status is None:
+            with self._init_lock:
+                if self._job_status is None:
+                    from wjr_count_contigs.jobstatus import JobStatusTracker
+                    cfg = config or {}
+                    self._job_status = JobStatusTracker(
+                        cache_size=cfg.get('job-status-cache-size', 10000),
+                        poll_interval=cfg.get('job-status-poll-interval', 1),
+                        max_wait=cfg.get('job-status-max-wait', 30),
+                        max_waiters=cfg.get('job-status-max-waiters', 2))
+        return self._job_status
+
     def __init__(self):
-        submod = get_service_name() or 'wjr_count_contigs'
-        self.userlog = log.log(
-            submod, ip_address=True, authuser=True, module=True, method=True,
-            call_id=True, changecallback=self.logcallback,
-            config=get_config_file())
-        self.serverlog = log.log(
-            submod, ip_address=True, authuser=True, module=True, method=True,
-            call_id=True, logfile=self.userlog.get_log_file())
-        self.serverlog.set_log_level(6)
+        self._submod = get_service_name() or 'wjr_count_contigs'
+        self._init_lock = threading.RLock()
+        self._userlog = None
+        self._serverlog = None
+        self._auth_client = None
+        self._admission = None
+        self._job_status = None
+        self.warm = False
         self.rpc_service = JSONRPCServiceCustom()
         self.method_authentication = dict()
         self.rpc_service.add(impl_wjr_count_contigs.count_contigs,
                              name='wjr_count_contigs.count_contigs',
                              types=[basestring, basestring])
         self.method_authentication['wjr_count_contigs.count_contigs'] = 'required'
-        self.auth_client = biokbase.nexus.Client(
-            config={'server': 'nexus.api.globusonline.org',
-                    'verify_ssl': True,
-                    'client': None,
-                    'client_secret': None})
+        self.rpc_service.add(impl_wjr_count_contigs.count_contigs_in_workspace,
+                             name='wjr_count_contigs.count_contigs_in_workspace',
+                             types=[basestring])
+        self.method_authentication['wjr_count_contigs.count_contigs_in_workspace'] = 'required'
+        self.rpc_service.add(impl_wjr_count_contigs.estimate_distinct_contigs,
+                             name='wjr_count_contigs.estimate_distinct_contigs',
+                             types=[basestring, list])
+        self.method_authentication['wjr_count_contigs.estimate_distinct_contigs'] = 'required'
+        self.rpc_service.add(self.status,
+                             name='wjr_count_contigs.status',
+                             types=[])
+        cfg = config or {}
+        self.max_request_size = int(cfg.get('max-request-size', 10485760))
+        self.response_buffer_size = int(cfg.get('response-buffer-size',
+                                                65536))
+        self.gzip_responses = cfg.get('gzip-responses', 'true') == 'true'
+        self.gzip_min_size = int(cfg.get('gzip-min-size', 1024))
+        self.gzip_level = int(cfg.get('gzip-level', 6))
 
     def __call__(self, environ, start_response):
+        # imported here to keep them out of an async job's startup
+        from wjr_count_contigs import compression
+        from wjr_count_contigs.admission import AdmissionRejected
         # Context object, equivalent to the perl impl CallContext
         ctx = MethodContext(self.userlog)
         ctx['client_ip'] = getIPAddress(environ)
         status = '500 Internal Server Error'
+        retry_after = None
+        req = None
+        content_type = 'application/json'
 
         try:
             body_size = int(environ.get('CONTENT_LENGTH', 0))
@@ -358,10 +635,27 @@ class Application(object):
             # we basically do nothing and just return headers
             status = '200 OK'
             rpc_result = ""
+        elif body_size > self.max_request_size:
+            err = {'error': {'code': -32600,
+                             'name': 'Request too large',
+                             'message': 'Request body of %d bytes exceeds ' %
+                                        body_size + 'the limit of %d bytes' %
+                                        self.max_request_size,
+                             }
+                   }
+            rpc_result = self.process_error(err, ctx, {'version': '1.1'})
+            status = '413 Request Entity Too Large'
         else:
-            request_body = environ['wsgi.input'].read(body_size)
+            request_body = read_request_body(environ['wsgi.input'], body_size)
             try:
-                req = json.loads(request_body)
+                encoding = environ.get('HTTP_CONTENT_ENCODING', 'identity')
+                if encoding.lower() in ('gzip', 'x-gzip'):
+                    request_body = compression.gunzip(request_body,
+                                                      self.max_request_size)
+                elif encoding.lower() != 'identity':
+                    raise ValueError('Unsupported Content-Encoding: ' +
+                                     encoding)
+                req = get_json_codec().loads(request_body)
             except ValueError as ve:
                 err = {'error': {'code': -32700,
                                  'name': "Parse error",
@@ -369,7 +663,28 @@ class Application(object):
                                  }
                        }
                 rpc_result = self.process_error(err, ctx, {'version': '1.1'})
-            else:
+                req = None
+            if req == []:
+                err = {'error': {'code': -32600,
+                                 'name': 'Invalid Request',
+                                 'message': 'Empty batch',
+                                 }
+                       }
+                rpc_result = self.process_error(err, ctx, {'version': '1.1'})
+            elif isinstance(req, list):
+                # a batch: answered as a JSON array, or as NDJSON lines sent
+                # as each call finishes when the client accepts that
+                stream = NDJSON in environ.get('HTTP_ACCEPT', '')
+                try:
+                    rpc_result = self.call_batch(environ, ctx, req, stream)
+                    status = '200 OK'
+                    if stream:
+                        content_type = NDJSON
+                except AdmissionRejected as ar:
+                    rpc_result = self.busy_error(ar, ctx, {'version': '1.1'})
+                    status = '503 Service Unavailable'
+                    retry_after = ar.retry_after
+            elif req is not None:
                 ctx['module'], ctx['method'] = req['method'].split('.')
                 ctx['call_id'] = req['id']
                 ctx['rpc_context'] = {'call_stack': [{'time':self.now_in_utc(), 'method': req['method']}]}
@@ -412,49 +727,81 @@ class Application(object):
                         self.log(log.INFO, ctx, 'X-Forwarded-For: ' +
                                  environ.get('HTTP_X_FORWARDED_FOR'))
                     method_name = req['method']
-                    if method_name in async_run_methods or method_name in async_check_methods:
-                        if method_name in async_run_methods:
-                            orig_method_pair = async_run_methods[method_name]
+                    # status must answer even when the server is saturated.
+                    # A check holds a slot only while it calls the job
+                    # service, not while it waits between polls.
+                    admission_key = None
+                    if (method_name != 'wjr_count_contigs.status' and
+                            method_name not in async_check_methods):
+                        admission_key = ctx['user_id'] or ctx['client_ip']
+                        self.admission.acquire(admission_key)
+                    try:
+                        if method_name in async_run_methods or method_name in async_check_methods:
+                            if method_name in async_run_methods:
+                                orig_method_pair = async_run_methods[method_name]
+                            else:
+                                orig_method_pair = async_check_methods[method_name]
+                            orig_method_name = orig_method_pair[0] + '.' + orig_method_pair[1]
+                            if 'required' != self.method_authentication.get(orig_method_name, 'none'):
+                                err = ServerError()
+                                err.data = 'Async method ' + orig_method_name + ' should require ' + \
+                                    'authentication, but it has authentication level: ' + \
+                                    self.method_authentication.get(orig_method_name, 'none')
+                                raise err
+                            if method_name in async_run_methods:
+                                job_service_client = get_job_service_client(ctx)
+                                run_job_params = {
+                                    'method': orig_method_name,
+                                    'params': req['params']}
+                                if 'rpc_context' in ctx:
+                                    run_job_params['rpc_context'] = ctx['rpc_context']
+                                job_id = job_service_client.run_job(run_job_params)
+                                respond = {'version': '1.1', 'result': [job_id], 'id': req['id']}
+                                rpc_result = get_json_codec().dumps(respond)
+                                status = '200 OK'
+                            else:
+                                job_id = req['params'][0]
+                                # optional second parameter: seconds to wait
+                                # for the job state to change
+                                wait = 0
+                                if len(req['params']) > 1:
+                                    wait = req['params'][1]
+                                if (isinstance(wait, bool) or
+                                        not isinstance(wait, (int, long, float))):
+                                    raise InvalidParamsError(
+                                        'The wait parameter must be a number ' +
+                                        'of seconds')
+                                check_key = ctx['user_id'] or ctx['client_ip']
+                                job_state = self.job_status.check(
+                                    (ctx['user_id'], job_id),
+                                    lambda: get_job_service_client(ctx).check_job(job_id),
+                                    wait,
+                                    acquire=lambda: self.admission.acquire(check_key),
+                                    release=lambda: self.admission.release(check_key))
+                                finished = job_state['finished']
+                                if finished != 0 and 'error' in job_state and job_state['error'] is not None:
+                                    err = {'error': job_state['error']}
+                                    rpc_result = self.process_error(err, ctx, req, None)
+                                else:
+                                    respond = {'version': '1.1', 'result': [job_state], 'id': req['id']}
+                                    rpc_result = get_json_codec().dumps(respond)
+                                    status = '200 OK'
+                        elif method_name in sync_methods or (method_name + '_async') not in async_run_methods:
+                            self.log(log.INFO, ctx, 'start method')
+                            rpc_result = self.rpc_service.call_iter(ctx, req)
+                            self.log(log.INFO, ctx, 'end method')
+                            status = '200 OK'
                         else:
-                            orig_method_pair = async_check_methods[method_name]
-                        orig_method_name = orig_method_pair[0] + '.' + orig_method_pair[1]
-                        if 'required' != self.method_authentication.get(orig_method_name, 'none'):
                             err = ServerError()
-                            err.data = 'Async method ' + orig_method_name + ' should require ' + \
-                                'authentication, but it has authentication level: ' + \
-                                self.method_authentication.get(orig_method_name, 'none')
+                            err.data = 'Method ' + method_name + ' cannot be run synchronously'
                             raise err
-                        job_service_client = AsyncJobServiceClient(token = ctx['token'])
-                        if method_name in async_run_methods:
-                            run_job_params = {
-                                'method': orig_method_name,
-                                'params': req['params']}
-                            if 'rpc_context' in ctx:
-                                run_job_params['rpc_context'] = ctx['rpc_context']
-                            job_id = job_service_client.run_job(run_job_params)
-                            respond = {'version': '1.1', 'result': [job_id], 'id': req['id']}
-                            rpc_result = json.dumps(respond, cls=JSONObjectEncoder)
-                            status = '200 OK'
-                        else:
-                            job_id = req['params'][0]
-                            job_state = job_service_client.check_job(job_id)
-                            finished = job_state['finished']
-                            if finished != 0 and 'error' in job_state and job_state['error'] is not None:
-                                err = {'error': job_state['error']}
-                                rpc_result = self.process_error(err, ctx, req, None)
-                            else:
-                                respond = {'version': '1.1', 'result': [job_state], 'id': req['id']}
-                                rpc_result = json.dumps(respond, cls=JSONObjectEncoder)
-                                status = '200 OK'
-                    elif method_name in sync_methods or (method_name + '_async') not in async_run_methods:
-                        self.log(log.INFO, ctx, 'start method')
-                        rpc_result = self.rpc_service.call(ctx, req)
-                        self.log(log.INFO, ctx, 'end method')
-                        status = '200 OK'
-                    else:
-                        err = ServerError()
-                        err.data = 'Method ' + method_name + ' cannot be run synchronously'
-                        raise err
+                    finally:
+                        if admission_key is not None:
+                            self.admission.release(admission_key)
+                except AdmissionRejected as ar:
+                    rpc_result = self.busy_error(ar, ctx, req)
+                    status = '503 Service Unavailable'
+                    retry_after = ar.retry_after
                 except JSONRPCError as jre:
                     err = {'error': {'code': jre.code,
                                      'name': jre.message,
@@ -479,21 +826,158 @@ class Application(object):
         # print 'The result from the method call is:\n%s\n' % \
         #    pprint.pformat(rpc_result)
 
-        if rpc_result:
-            response_body = rpc_result
-        else:
-            response_body = ''
+        try:
+            # NDJSON records go out as soon as they are ready
+            response_body, body_length = buffer_response(
+                rpc_result or '',
+                0 if content_type == NDJSON else self.response_buffer_size)
+        except Exception:
+            # the result could not be encoded as JSON
+            close = getattr(rpc_result, 'close', None)
+            if close is not None:
+                close()
+            err = {'error': {'code': 0,
+                             'name': 'Unexpected Server Error',
+                             'message': 'An unexpected server error occurred',
+                             }
+                   }
+            rpc_result = self.process_error(err, ctx, req or {'version': '1.1'},
+                                            traceback.format_exc())
+            response_body, body_length = [rpc_result], len(rpc_result)
+            status = '500 Internal Server Error'
+
+        content_encoding = None
+        if self.gzip_responses and compression.accepts_gzip(
+                environ.get('HTTP_ACCEPT_ENCODING')):
+            if body_length is None:
+                response_body = ClosingIterator(
+                    compression.gzip_iter(response_body, self.gzip_level,
+                                          flush_each=content_type == NDJSON),
+                    response_body.close)
+                content_encoding = 'gzip'
+            elif body_length >= self.gzip_min_size:
+                response_body = [compression.gzip_string(
+                    ''.join(response_body), self.gzip_level)]
+                body_length = len(response_body[0])
+                content_encoding = 'gzip'
 
         response_headers = [
             ('Access-Control-Allow-Origin', '*'),
             ('Access-Control-Allow-Headers', environ.get(
                 'HTTP_ACCESS_CONTROL_REQUEST_HEADERS', 'authorization')),
-            ('content-type', 'application/json'),
-            ('content-length', str(len(response_body)))]
+            ('content-type', content_type)]
+        if body_length is not None:
+            response_headers.append(('content-length', str(body_length)))
+        if self.gzip_responses:
+            response_headers.append(('Vary', 'Accept-Encoding'))
+        if content_encoding is not None:
+            response_headers.append(('Content-Encoding', content_encoding))
+        if retry_after is not None:
+            response_headers.append(('Retry-After', str(retry_after)))
         start_response(status, response_headers)
-        return [response_body]
+        return response_body
+
+    def call_batch(self, environ, ctx, requests, stream):
+        '''
+        Runs a JSON-RPC batch of synchronous calls under a single admission
+        slot. The token is validated once for the whole batch. Returns the
+        responses as a JSON array, or with stream as a generator of NDJSON
+        lines, one per call, each produced as soon as its call finishes.
+        '''
+        token = environ.get('HTTP_AUTHORIZATION')
+        user = None
+        auth_error = None
+        if token is not None:
+            try:
+                user, _, _ = self.auth_client.validate_token(token)
+            except Exception, e:
+                auth_error = "Token validation failed: %s" % e
+        admission_key = user or ctx['client_ip']
+        self.admission.acquire(admission_key)
+
+        def responses():
+            for request in requests:
+                resp = self.call_batch_item(ctx['client_ip'], token, user,
+                                            auth_error, request)
+                if resp is not None:
+                    yield resp
+        if stream:
+            # the slot is held until the server closes the response
+            return ClosingIterator(
+                (get_json_codec().dumps(resp) + '\n' for resp in responses()),
+                lambda: self.admission.release(admission_key))
+        try:
+            return get_json_codec().iterencode(list(responses()))
+        finally:
+            self.admission.release(admission_key)
+
+    def call_batch_item(self, client_ip, token, user, auth_error, request):
+        '''Runs one call of a batch and returns its response or error.'''
+        ctx = MethodContext(self.userlog)
+        ctx['client_ip'] = client_ip
+        if not isinstance(request, dict):
+            request = {}
+        try:
+            if 'method' not in request or 'params' not in request:
+                raise InvalidRequestError
+            method_name = request['method']
+            ctx['module'], ctx['method'] = method_name.split('.')
+            ctx['call_id'] = request.get('id')
+            ctx['rpc_context'] = {'call_stack': [{'time': self.now_in_utc(),
+                                                  'method': method_name}]}
+            ctx['provenance'] = [{'service': ctx['module'],
+                                  'method': ctx['method'],
+                                  'method_params': request['params']}]
+            if method_name not in sync_methods:
+                err = ServerError()
+                err.data = 'Method ' + method_name + \
+                    ' cannot be called in a batch'
+                raise err
+            auth_req = self.method_authentication.get(method_name, 'none')
+            if auth_req != 'none' and user is not None:
+                ctx['user_id'] = user
+                ctx['authenticated'] = 1
+                ctx['token'] = token
+            elif auth_req == 'required':
+                err = ServerError()
+                err.data = auth_error or "Authentication required for " + \
+                    "wjr_count_contigs but no authentication header was passed"
+                raise err
+            self.log(log.INFO, ctx, 'start method')
+            resp = self.rpc_service.call_py(ctx, request)
+            self.log(log.INFO, ctx, 'end method')
+            return resp
+        except JSONRPCError as jre:
+            err = {'error': {'code': jre.code,
+                             'name': jre.message,
+                             'message': jre.data
+                             }
+                   }
+            trace = jre.trace if hasattr(jre, 'trace') else None
+            return self.error_response(err, ctx, request, trace)
+        except Exception, e:
+            err = {'error': {'code': 0,
+                             'name': 'Unexpected Server Error',
+                             'message': 'An unexpected server error ' +
+                                        'occurred',
+                             }
+                   }
+            return self.error_response(err, ctx, request,
+                                       traceback.format_exc())
+
+    def busy_error(self, rejected, context, request):
+        err = {'error': {'code': -32001,
+                         'name': 'Server busy',
+                         'message': '%s, retry after %d seconds' %
+                                    (rejected.reason, rejected.retry_after),
+                         }
+               }
+        return self.process_error(err, context, request)
 
     def process_error(self, error, context, request, trace=None):
+        return json.dumps(self.error_response(error, context, request, trace))
+
+    def error_response(self, error, context, request, trace=None):
         if trace:
             self.log(log.ERR, context, trace.split('\n')[0:-1])
         if 'id' in request:
@@ -508,7 +992,21 @@ class Application(object):
         else:
             error['version'] = '1.0'
             error['error']['error'] = trace
-        return json.dumps(error)
+        return error
+
+    def status(self, ctx):
+        '''Reports the server's load: admission queue depth and log queue.'''
+        returnVal = {'state': 'OK' if self.warm else 'WARMING',
+                     'execution_mode': execution.mode(),
+                     'admission': self.admission.stats(),
+                     'job_status': self.job_status.stats()}
+        returnVal['startup'] = startup.report()
+        from wjr_count_contigs.logqueue import QueuedLog
+        for name, logger in (('userlog', self._userlog),
+                             ('serverlog', self._serverlog)):
+            if isinstance(logger, QueuedLog):
+                returnVal[name] = logger.stats()
+        return [returnVal]
 
     def now_in_utc(self):
         # Taken from http://stackoverflow.com/questions/3401428/how-to-get-an-isoformat-datetime-string-including-the-default-timezone
@@ -519,6 +1017,68 @@ class Application(object):
         return "%s%+02d:%02d" % (dtnow.isoformat(), hh, mm)
 
 application = Application()
+startup.mark('application')
+if environ.get('KB_STARTUP_REPORT'):
+    startup.print_report()
+
+
+def preload():
+    '''
+    Shared setup done once in a pre-forking master so that workers inherit
+    it: import the modules that are otherwise loaded on first use, and build
+    the admission controller, whose counters all workers share. Nothing
+    holding sockets, threads or processes is created here.
+    '''
+    with startup.phase('preload'):
+        import biokbase.nexus
+        import multiprocessing
+        from wjr_count_contigs import compression, localjobs, logqueue
+        get_json_codec()
+        application.admission
+        ready_file = (config or {}).get('ready-file')
+        if ready_file:
+            startup.reset_ready(ready_file)
+        # free the garbage left by the imports once here, rather than in
+        # every worker. This does not keep workers from copying inherited
+        # pages: their own collections and refcount updates still write to
+        # them.
+        import gc
+        gc.collect()
+
+
+def warm_up_worker(worker_id=None, num_workers=1):
+    '''
+    Per-worker setup run right after fork, before the worker takes requests:
+    build the loggers (and their writer threads) and the auth client. Then
+    signals readiness. The local job pool is left to the first async job,
+    so that workers which never run one do not start its processes.
+    '''
+    with startup.phase('worker warm-up'):
+        application.userlog
+        application.serverlog
+        application.auth_client
+    application.warm = True
+    ready_file = (config or {}).get('ready-file')
+    if ready_file:
+        startup.worker_ready(ready_file, worker_id or os.getpid(), num_workers)
+
+
+def stop_worker():
+    '''Flushes queued log records; standalone workers exit without atexit.'''
+    from wjr_count_contigs.logqueue import QueuedLog
+    for logger in (application._userlog, application._serverlog):
+        if isinstance(logger, QueuedLog):
+            logger.close()
+
+
+def worker_exited(pid):
+    '''Reclaims any admission slots a worker still held when it exited.
+    Under uwsgi this happens the next time a request would be rejected.'''
+    reclaimed = application.admission.reclaim()
+    if reclaimed:
+        print 'Reclaimed %d admission slots of worker pid %d' % (reclaimed,
+                                                                  pid)
+
 
 # This is the uwsgi application dictionary. On startup uwsgi will look
 # for this dict and pull its configuration from here.
@@ -535,18 +1095,16 @@ application = Application()
 #
 try:
     import uwsgi
-# Before we do anything with the application, see if the
-# configs specify patching all std routines to be asynch
-# *ONLY* use this if you are going to wrap the service in
-# a wsgi container that has enabled gevent, such as
-# uwsgi with the --gevent option
-    if config is not None and config.get('gevent_monkeypatch_all', False):
-        print "Monkeypatching std libraries for async"
-        from gevent import monkey
-        monkey.patch_all()
+# Patching the std routines for gevent (execution-mode = gevent) is done
+# at the top of this file. *ONLY* use it if you are going to wrap the
+# service in a wsgi container that has enabled gevent, such as uwsgi with
+# the --gevent option, or the standalone server below
     uwsgi.applications = {
         '': application
         }
+    preload()
+    uwsgi.post_fork_hook = lambda: warm_up_worker(uwsgi.worker_id(),
+                                                  uwsgi.numproc)
 except ImportError:
     # Not available outside of wsgi, ignore
     pass
@@ -554,32 +1112,63 @@ except ImportError:
 _proc = None
 
 
-def start_server(host='localhost', port=0, newprocess=False):
+def start_server(host='localhost', port=0, newprocess=False, processes=None,
+                 threads=None):
     '''
     By default, will start the server on localhost on a system assigned port
     in the main thread. Excecution of the main thread will stay in the server
     main loop until interrupted. To run the server in a separate process, and
     thus allow the stop_server method to be called, set newprocess = True. This
-    will also allow returning of the port number.'''
+    will also allow returning of the port number.
 
+    The server forks processes workers (server-processes in the config, 5 by
+    default), each handling up to threads requests at once (server-threads,
+    5 by default), like the uwsgi deployment. With execution-mode = gevent
+    the handlers are greenlets and threads defaults to gevent-concurrency.'''
+
+    from multiprocessing import Process
+    from wjr_count_contigs import standalone
     global _proc
     if _proc:
         raise RuntimeError('server is already running')
-    httpd = make_server(host, port, application)
+    cfg = config or {}
+    if processes is None:
+        processes = int(cfg.get('server-processes', 5))
+    if threads is None and execution.mode() == execution.GEVENT:
+        threads = int(cfg.get('gevent-concurrency', 200))
+    if threads is None:
+        threads = int(cfg.get('server-threads', 5))
+    preload()
+    httpd = standalone.make_server(
+        host, port, application, threads=threads,
+        keepalive_timeout=float(cfg.get('server-keepalive-timeout', 5)))
     port = httpd.server_address[1]
     print "Listening on port %s" % port
+
+    def serve():
+        standalone.serve(httpd, processes, on_worker_start=warm_up_worker,
+                         on_worker_stop=stop_worker,
+                         on_worker_exit=worker_exited)
     if newprocess:
-        _proc = Process(target=httpd.serve_forever)
-        _proc.daemon = True
+        # not a daemon: daemonic processes may not start the local job pool
+        # in their workers. It is still stopped when this process exits.
+        _proc = Process(target=serve)
         _proc.start()
+        import atexit
+        atexit.register(stop_server)
     else:
-        httpd.serve_forever()
+        serve()
     return port
 
 
 def stop_server():
+    '''Stops a server started with newprocess = True, letting in-flight
+    requests finish.'''
     global _proc
+    if _proc is None:
+        return
     _proc.terminate()
+    _proc.join()
     _proc = None
 
 def process_async_cli(input_file_path, output_file_path, token):
@@ -590,10 +1179,13 @@ def process_async_cli(input_file_path, output_file_path, token):
         req['version'] = '1.1'
     if 'id' not in req: 
         req['id'] = str(_random.random())[2:]
-    ctx = MethodContext(application.userlog)
+    ctx = MethodContext(None)
     if token:
-        user, _, _ = application.auth_client.validate_token(token)
-        ctx['user_id'] = user
+        # the job service checked the token when the job was submitted; the
+        # auth client is only needed if the method asks for the user name
+        del ctx['user_id']
+        ctx.user_lookup = \
+            lambda: application.auth_client.validate_token(token)[0]
         ctx['authenticated'] = 1
         ctx['token'] = token
     if 'context' in req:
@@ -641,23 +1233,30 @@ if __name__ == "__main__":
                 token = sys.argv[3]
         sys.exit(process_async_cli(sys.argv[1], sys.argv[2], token))
     try:
-        opts, args = getopt(sys.argv[1:], "", ["port=", "host="])
+        opts, args = getopt(sys.argv[1:], "", ["port=", "host=",
+                                              "processes=", "threads="])
     except GetoptError as err:
         # print help information and exit:
         print str(err)  # will print something like "option -a not recognized"
         sys.exit(2)
     port = 9999
     host = 'localhost'
+    processes = None
+    threads = None
     for o, a in opts:
         if o == '--port':
             port = int(a)
         elif o == '--host':
             host = a
             print "Host set to %s" % host
+        elif o == '--processes':
+            processes = int(a)
+        elif o == '--threads':
+            threads = int(a)
         else:
             assert False, "unhandled option"
 
-    start_server(host=host, port=port)
+    start_server(host=host, port=port, processes=processes, threads=threads)
 #    print "Listening on port %s" % port
 #    httpd = make_server( host, port, application)
 #
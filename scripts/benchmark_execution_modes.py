@@ -0,0 +1,99 @@
+'''
+Compares running servers, e.g. one started with execution-mode = threaded and
+one with execution-mode = gevent, by firing count_contigs calls at each with
+the same client concurrency and reporting throughput and latency.
+
+Usage:
+  python benchmark_execution_modes.py --token TOKEN --workspace WS \\
+      --contigset ID [--concurrency 200] [--requests 2000] \\
+      threaded=http://localhost:5000 gevent=http://localhost:5001
+'''
+import json
+import sys
+import threading
+import time
+import Queue
+from getopt import getopt, GetoptError
+
+import requests
+
+
+def run(url, token, workspace, contigset, concurrency, total):
+    body = json.dumps({'method': 'wjr_count_contigs.count_contigs',
+                       'params': [workspace, contigset],
+                       'version': '1.1', 'id': '1'})
+    headers = {'Authorization': token}
+    todo = Queue.Queue()
+    for i in range(total):
+        todo.put(i)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client():
+        session = requests.Session()
+        while True:
+            try:
+                todo.get_nowait()
+            except Queue.Empty:
+                return
+            began = time.time()
+            try:
+                ret = session.post(url, data=body, headers=headers, timeout=300)
+                ok = ret.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            with lock:
+                if ok:
+                    latencies.append(time.time() - began)
+                else:
+                    errors[0] += 1
+
+    began = time.time()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    elapsed = time.time() - began
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return float('nan')
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    return {'requests_per_second': len(latencies) / elapsed,
+            'p50': pct(0.5), 'p99': pct(0.99), 'errors': errors[0]}
+
+
+def main(argv):
+    try:
+        opts, servers = getopt(argv, '', ['token=', 'workspace=', 'contigset=',
+                                          'concurrency=', 'requests='])
+    except GetoptError as err:
+        print str(err)
+        print __doc__
+        return 2
+    opts = dict(opts)
+    if not servers or not all(k in opts for k in
+                              ('--token', '--workspace', '--contigset')):
+        print __doc__
+        return 2
+    concurrency = int(opts.get('--concurrency', 200))
+    total = int(opts.get('--requests', 2000))
+    print '%-12s %10s %10s %10s %8s' % ('server', 'req/s', 'p50 (s)',
+                                         'p99 (s)', 'errors')
+    for server in servers:
+        label, sep, url = server.partition('=')
+        if not sep:
+            label, url = url, server
+        res = run(url, opts['--token'], opts['--workspace'],
+                  opts['--contigset'], concurrency, total)
+        print '%-12s %10.1f %10.3f %10.3f %8d' % (
+            label or url, res['requests_per_second'], res['p50'], res['p99'],
+            res['errors'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -2,4 +2,8 @@
 script_dir=$(dirname "$(readlink -f "$0")")
 export KB_DEPLOYMENT_CONFIG=$script_dir/../deploy.cfg
 export PYTHONPATH=$script_dir/../lib:$PATH:$PYTHONPATH
-uwsgi --master --processes 5 --threads 5 --http :5000 --wsgi-file $script_dir/../lib/wjr_count_contigs/wjr_count_contigsServer.py
+if [ "$(python -m wjr_count_contigs.execution)" = gevent ]; then
+    uwsgi --master --processes 5 --gevent 200 --http :5000 --wsgi-file $script_dir/../lib/wjr_count_contigs/wjr_count_contigsServer.py
+else
+    uwsgi --master --processes 5 --threads 5 --http :5000 --wsgi-file $script_dir/../lib/wjr_count_contigs/wjr_count_contigsServer.py
+fi
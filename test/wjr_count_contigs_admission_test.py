@@ -0,0 +1,124 @@
+import unittest
+import os
+import threading
+import time
+
+from wjr_count_contigs.admission import AdmissionController, AdmissionRejected
+
+
+class wjr_count_contigsAdmissionTest(unittest.TestCase):
+
+    def test_acquire_release(self):
+        ac = AdmissionController(max_active=2, max_active_per_user=1)
+        ac.acquire('alice')
+        ac.acquire('bob')
+        stats = ac.stats()
+        self.assertEqual(stats['active'], 2)
+        self.assertEqual(stats['active_users'], 2)
+        ac.release('alice')
+        ac.release('bob')
+        stats = ac.stats()
+        self.assertEqual(stats['active'], 0)
+        self.assertEqual(stats['active_users'], 0)
+        self.assertEqual(stats['admitted'], 2)
+
+    def test_reject_when_queue_full(self):
+        ac = AdmissionController(max_active=1, max_waiting=0, max_wait=3)
+        ac.acquire('alice')
+        with self.assertRaises(AdmissionRejected) as cm:
+            ac.acquire('bob')
+        self.assertEqual(cm.exception.reason, 'Server is busy')
+        self.assertEqual(cm.exception.retry_after, 3)
+        self.assertEqual(ac.stats()['rejected'], 1)
+
+    def test_per_user_limit(self):
+        ac = AdmissionController(max_active=10, max_active_per_user=1)
+        ac.acquire('alice')
+        self.assertRaises(AdmissionRejected, ac.acquire, 'alice')
+        # other users are not affected
+        ac.acquire('bob')
+
+    def test_wait_times_out(self):
+        ac = AdmissionController(max_active=1, max_waiting=1, max_wait=0.2,
+                                 poll_interval=0.01)
+        ac.acquire('alice')
+        began = time.time()
+        with self.assertRaises(AdmissionRejected) as cm:
+            ac.acquire('bob')
+        self.assertGreaterEqual(time.time() - began, 0.2)
+        self.assertEqual(cm.exception.reason,
+                         'Timed out waiting for a free slot')
+        self.assertEqual(ac.stats()['queue_depth'], 0)
+
+    def test_wait_for_release(self):
+        ac = AdmissionController(max_active=1, max_waiting=1, max_wait=5,
+                                 poll_interval=0.01)
+        ac.acquire('alice')
+        timer = threading.Timer(0.1, ac.release, ['alice'])
+        timer.start()
+        ac.acquire('bob')
+        timer.join()
+        stats = ac.stats()
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def fork_holding(self, ac, *keys):
+        '''Forks a child that takes a slot for each key, then waits until
+        the returned function is called, and exits.'''
+        ready_r, ready_w = os.pipe()
+        exit_r, exit_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                for key in keys:
+                    ac.acquire(key)
+                os.write(ready_w, 'x')
+                os.read(exit_r, 1)
+            except Exception:
+                code = 1
+            os._exit(code)
+        self.assertEqual(os.read(ready_r, 1), 'x')
+
+        def finish():
+            os.write(exit_w, 'x')
+            _, code = os.waitpid(pid, 0)
+            self.assertEqual(code, 0)
+        return finish
+
+    def test_shared_with_forked_processes(self):
+        ac = AdmissionController(max_active=5, max_active_per_user=2)
+        finish = self.fork_holding(ac, 'alice', 'alice')
+        # the child's slots count against this process too
+        self.assertEqual(ac.stats()['active'], 2)
+        self.assertRaises(AdmissionRejected, ac.acquire, 'alice')
+        ac.acquire('bob')
+        # releasing in this process does not free the child's slots
+        ac.release('alice')
+        self.assertEqual(ac.stats()['active'], 3)
+        finish()
+
+    def test_slots_of_exited_process_are_reclaimed(self):
+        ac = AdmissionController(max_active=2, max_active_per_user=2)
+        self.fork_holding(ac, 'alice', 'bob')()
+        # the child exited holding both slots; a request that would be
+        # rejected reclaims them
+        ac.acquire('alice')
+        stats = ac.stats()
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['active_users'], 1)
+        self.assertEqual(stats['reclaimed'], 2)
+        self.assertEqual(stats['rejected'], 0)
+        ac.release('alice')
+        self.assertEqual(ac.stats()['active'], 0)
+
+    def test_reclaim(self):
+        ac = AdmissionController(max_active=5)
+        ac.acquire('alice')
+        self.fork_holding(ac, 'alice', 'bob')()
+        self.assertEqual(ac.reclaim(), 2)
+        self.assertEqual(ac.reclaim(), 0)
+        # this process's own slot is kept
+        stats = ac.stats()
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['active_users'], 1)
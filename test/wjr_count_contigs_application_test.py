@@ -0,0 +1,208 @@
+import unittest
+import json
+import zlib
+
+from StringIO import StringIO
+
+import wjr_count_contigs.wjr_count_contigsServer as server
+from wjr_count_contigs import compression
+from wjr_count_contigs.admission import AdmissionController
+
+
+class FakeAuthClient(object):
+    '''Accepts any token, using it as the user name.'''
+
+    def validate_token(self, token):
+        return token, None, None
+
+
+class wjr_count_contigsApplicationTest(unittest.TestCase):
+    '''Drives the WSGI application directly, without a server or network.'''
+
+    def setUp(self):
+        self.app = server.application
+        self.saved = (self.app._auth_client, self.app.admission)
+        self.app._auth_client = FakeAuthClient()
+
+    def tearDown(self):
+        self.app._auth_client, self.app.admission = self.saved
+
+    def request(self, body, token=None, **headers):
+        environ = {'REQUEST_METHOD': 'POST',
+                   'CONTENT_LENGTH': str(len(body)),
+                   'REMOTE_ADDR': '127.0.0.1',
+                   'wsgi.input': StringIO(body)}
+        if token is not None:
+            environ['HTTP_AUTHORIZATION'] = token
+        environ.update(headers)
+        response = {}
+
+        def start_response(status, response_headers):
+            response['status'] = status
+            response['headers'] = dict(response_headers)
+        response['body'] = self.app(environ, start_response)
+        return response
+
+    def rpc(self, method, params):
+        return json.dumps({'method': 'wjr_count_contigs.' + method,
+                           'params': params, 'version': '1.1', 'id': '1'})
+
+    def test_status(self):
+        resp = self.request(self.rpc('status', []))
+        self.assertEqual(resp['status'], '200 OK')
+        result = json.loads(''.join(resp['body']))['result'][0]
+        self.assertIn('admission', result)
+
+    def test_busy_server_answers_503(self):
+        self.app.admission = AdmissionController(max_active=1, max_wait=4)
+        self.app.admission.acquire('alice')
+        resp = self.request(self.rpc('count_contigs', ['ws', 'obj']),
+                            token='bob')
+        self.assertEqual(resp['status'], '503 Service Unavailable')
+        self.assertEqual(resp['headers']['Retry-After'], '4')
+        err = json.loads(''.join(resp['body']))['error']
+        self.assertEqual(err['code'], -32001)
+        self.assertEqual(err['name'], 'Server busy')
+        self.assertEqual(self.app.admission.stats()['rejected'], 1)
+        # status is not subject to the limits
+        resp = self.request(self.rpc('status', []))
+        self.assertEqual(resp['status'], '200 OK')
+
+    def test_gzip_request_body(self):
+        body = compression.gzip_string(self.rpc('status', []))
+        resp = self.request(body, HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(resp['status'], '200 OK')
+        self.assertIn('result', json.loads(''.join(resp['body'])))
+        for bad in [body[:-4], 'not gzip']:
+            resp = self.request(bad, HTTP_CONTENT_ENCODING='gzip')
+            err = json.loads(''.join(resp['body']))['error']
+            self.assertEqual(err['code'], -32700)
+        resp = self.request(body, HTTP_CONTENT_ENCODING='br')
+        err = json.loads(''.join(resp['body']))['error']
+        self.assertIn('Unsupported Content-Encoding', err['message'])
+
+    def test_response_encoding_negotiation(self):
+        self.app.gzip_min_size, gzip_min_size = 0, self.app.gzip_min_size
+        self.addCleanup(setattr, self.app, 'gzip_min_size', gzip_min_size)
+        resp = self.request(self.rpc('status', []),
+                            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(resp['headers']['Vary'], 'Accept-Encoding')
+        body = zlib.decompress(''.join(resp['body']), 16 + zlib.MAX_WBITS)
+        self.assertIn('result', json.loads(body))
+        for refused in [None, 'gzip;q=0, *', 'identity']:
+            headers = {'HTTP_ACCEPT_ENCODING': refused} if refused else {}
+            resp = self.request(self.rpc('status', []), **headers)
+            self.assertNotIn('Content-Encoding', resp['headers'])
+            self.assertIn('result', json.loads(''.join(resp['body'])))
+
+    def test_check_is_subject_to_admission(self):
+        self.app.admission = AdmissionController(max_active=1, max_wait=4)
+        self.app.admission.acquire('alice')
+        resp = self.request(self.rpc('count_contigs_check', ['job']),
+                            token='bob')
+        self.assertEqual(resp['status'], '503 Service Unavailable')
+
+    def call(self, method, params, id):
+        return {'method': 'wjr_count_contigs.' + method, 'params': params,
+                'version': '1.1', 'id': id}
+
+    def test_batch_array(self):
+        batch = [self.call('status', [], 'a'), self.call('status', [], 'b')]
+        resp = self.request(json.dumps(batch))
+        self.assertEqual(resp['status'], '200 OK')
+        self.assertEqual(resp['headers']['content-type'], 'application/json')
+        results = json.loads(''.join(resp['body']))
+        self.assertEqual([r['id'] for r in results], ['a', 'b'])
+        self.assertTrue(all('result' in r for r in results))
+
+    def test_batch_ndjson(self):
+        batch = [self.call('status', [], 'a'), self.call('status', [], 'b')]
+        resp = self.request(json.dumps(batch),
+                            HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(resp['headers']['content-type'],
+                         'application/x-ndjson')
+        self.assertNotIn('content-length', resp['headers'])
+        lines = ''.join(resp['body']).splitlines()
+        self.assertEqual([json.loads(l)['id'] for l in lines], ['a', 'b'])
+        resp['body'].close()
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+    def test_batch_item_errors(self):
+        batch = [self.call('status', [], 'a'),
+                 self.call('count_contigs', ['ws', 'obj'], 'b'),
+                 self.call('count_contigs_async', [['ws', 'obj']], 'c'),
+                 42]
+        resp = self.request(json.dumps(batch))
+        self.assertEqual(resp['status'], '200 OK')
+        results = json.loads(''.join(resp['body']))
+        self.assertEqual(len(results), 4)
+        self.assertIn('result', results[0])
+        # no token
+        self.assertIn('Authentication required', results[1]['error']['message'])
+        self.assertEqual(results[1]['id'], 'b')
+        self.assertIn('cannot be called in a batch',
+                      results[2]['error']['message'])
+        # not a call at all
+        self.assertEqual(results[3]['error']['code'], -32600)
+
+    def test_empty_batch(self):
+        resp = self.request('[]')
+        self.assertEqual(resp['status'], '500 Internal Server Error')
+        err = json.loads(''.join(resp['body']))['error']
+        self.assertEqual(err['code'], -32600)
+
+    def test_batch_stream_closed_early(self):
+        self.app.admission = AdmissionController(max_active=1)
+        batch = [self.call('status', [], str(i)) for i in range(5)]
+        resp = self.request(json.dumps(batch),
+                            HTTP_ACCEPT='application/x-ndjson')
+        body = iter(resp['body'])
+        self.assertEqual(json.loads(next(body))['id'], '0')
+        self.assertEqual(self.app.admission.stats()['active'], 1)
+        resp['body'].close()
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+    def test_check_wait_must_be_a_number(self):
+        resp = self.request(self.rpc('count_contigs_check', ['job', 'soon']),
+                            token='bob')
+        err = json.loads(''.join(resp['body']))['error']
+        self.assertEqual(err['code'], -32602)
+        self.assertIn('wait', err['message'])
+
+    def test_request_too_large(self):
+        class Unreadable(object):
+            def read(self, size=-1):
+                raise AssertionError('the body must not be read')
+        size = str(self.app.max_request_size + 1)
+        resp = self.request('', CONTENT_LENGTH=size,
+                            **{'wsgi.input': Unreadable()})
+        self.assertEqual(resp['status'], '413 Request Entity Too Large')
+        err = json.loads(''.join(resp['body']))['error']
+        self.assertEqual(err['code'], -32600)
+
+    def test_read_request_body_in_chunks(self):
+        body = StringIO('x' * 1000)
+        self.assertEqual(server.read_request_body(body, 1000, chunk_size=7),
+                         'x' * 1000)
+        # stops at the end of the stream
+        self.assertEqual(server.read_request_body(StringIO('abc'), 10), 'abc')
+
+    def test_buffer_response(self):
+        self.assertEqual(server.buffer_response('abc', 10), (['abc'], 3))
+        self.assertEqual(server.buffer_response(iter(['a', 'b']), 10),
+                         (['ab'], 2))
+        body, length = server.buffer_response(iter(['abc', 'def', 'g']), 4)
+        self.assertIsNone(length)
+        self.assertEqual(''.join(body), 'abcdefg')
+
+    def test_large_response_is_streamed(self):
+        saved = self.app.response_buffer_size
+        self.app.response_buffer_size = 10
+        try:
+            resp = self.request(self.rpc('status', []))
+        finally:
+            self.app.response_buffer_size = saved
+        self.assertEqual(resp['status'], '200 OK')
+        self.assertNotIn('content-length', resp['headers'])
+        self.assertIn('result', json.loads(''.join(resp['body'])))
@@ -0,0 +1,43 @@
+import unittest
+import zlib
+
+from wjr_count_contigs.compression import accepts_gzip, gunzip, gzip_iter, \
+    gzip_string
+
+
+class wjr_count_contigsCompressionTest(unittest.TestCase):
+
+    def test_gunzip(self):
+        self.assertEqual(gunzip(gzip_string('abc'), 100), 'abc')
+        self.assertEqual(gunzip(gzip_string(''), 100), '')
+
+    def test_gunzip_reads_every_member(self):
+        self.assertEqual(gunzip(gzip_string('ab') + gzip_string('cd'), 100),
+                         'abcd')
+
+    def test_gunzip_size_limit(self):
+        self.assertEqual(gunzip(gzip_string('x' * 100), 100), 'x' * 100)
+        self.assertRaises(ValueError, gunzip, gzip_string('x' * 101), 100)
+        # the limit covers all members together
+        self.assertRaises(ValueError, gunzip,
+                          gzip_string('x' * 60) + gzip_string('x' * 60), 100)
+
+    def test_gunzip_rejects_bad_input(self):
+        data = gzip_string('abcdef' * 10)
+        for bad in ['', 'not gzip', data[:5], data[:-3], data + 'junk']:
+            self.assertRaises(ValueError, gunzip, bad, 1000)
+
+    def test_accepts_gzip(self):
+        for header in ['gzip', 'deflate, gzip', 'x-gzip;q=0.5', '*',
+                       'GZIP;q=0, x-gzip']:
+            self.assertTrue(accepts_gzip(header), header)
+        for header in [None, '', 'deflate', 'gzip;q=0', '*;q=0',
+                       'gzip;q=0, *', '*, gzip;q=0']:
+            self.assertFalse(accepts_gzip(header), header)
+
+    def test_gzip_iter_flushes_each_chunk(self):
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = gzip_iter(iter(['one\n', 'two\n']), flush_each=True)
+        self.assertEqual(d.decompress(next(chunks)), 'one\n')
+        self.assertEqual(d.decompress(next(chunks)), 'two\n')
+        self.assertEqual(''.join(d.decompress(c) for c in chunks), '')
@@ -0,0 +1,32 @@
+import unittest
+import os
+import tempfile
+
+from wjr_count_contigs import execution
+
+
+class wjr_count_contigsExecutionTest(unittest.TestCase):
+
+    def mode(self, settings):
+        fd, path = tempfile.mkstemp(suffix='.cfg')
+        with os.fdopen(fd, 'w') as f:
+            f.write('[wjr_count_contigs]\n' + settings)
+        self.addCleanup(os.remove, path)
+        return execution.configured_mode(
+            execution.read_config(path, 'wjr_count_contigs'))
+
+    def test_configured_mode(self):
+        self.assertEqual(self.mode(''), execution.THREADED)
+        self.assertEqual(self.mode('execution-mode = gevent\n'),
+                         execution.GEVENT)
+        self.assertEqual(self.mode('execution-mode = threaded\n' +
+                                   'gevent_monkeypatch_all = true\n'),
+                         execution.THREADED)
+
+    def test_legacy_flag_is_boolean(self):
+        self.assertEqual(self.mode('gevent_monkeypatch_all = true\n'),
+                         execution.GEVENT)
+        self.assertEqual(self.mode('gevent_monkeypatch_all = false\n'),
+                         execution.THREADED)
+        self.assertEqual(self.mode('gevent_monkeypatch_all = 0\n'),
+                         execution.THREADED)
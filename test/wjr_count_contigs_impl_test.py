@@ -0,0 +1,55 @@
+import unittest
+
+from wjr_count_contigs.wjr_count_contigsImpl import wjr_count_contigs
+
+
+class FakeWorkspace(object):
+    '''Answers the reads the Impl makes; objects maps an object id to its
+    contigs, or to an exception to raise when the object is fetched.'''
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def info(self, obj_id):
+        return [obj_id, 'contigset.%d' % obj_id, 'KBaseGenomes.ContigSet',
+                None, 1, 'someone', 7]
+
+    def __call__(self, token, method, params):
+        if method == 'list_objects':
+            return [self.info(obj_id) for obj_id in sorted(self.objects)
+                    if obj_id >= params['minObjectID']]
+        if method == 'get_object_info_new':
+            return [self.info(int(o['ref'].split('/')[1]))
+                    for o in params['objects']]
+        contigs = self.objects[int(params[0]['ref'].split('/')[1])]
+        if isinstance(contigs, Exception):
+            raise contigs
+        return [{'data': {'contigs': contigs}}]
+
+
+class wjr_count_contigsImplTest(unittest.TestCase):
+
+    def impl(self, objects):
+        impl = wjr_count_contigs({'workspace-url': 'http://localhost'})
+        impl._ws_read = FakeWorkspace(objects)
+        return impl
+
+    def test_unreadable_object_does_not_fail_the_workspace(self):
+        impl = self.impl({1: [{'id': 'a'}, {'id': 'b'}],
+                          2: ValueError('Object 2 has been deleted'),
+                          3: [{'id': 'c'}]})
+        ret = impl.count_contigs_in_workspace({'token': 't'}, 'ws')[0]
+        self.assertEqual(ret['object_count'], 3)
+        self.assertEqual(ret['total_contig_count'], 3)
+        self.assertEqual(ret['error_count'], 1)
+        counts = dict((c['ref'], c) for c in ret['counts'])
+        self.assertEqual(counts['7/1/1']['contig_count'], 2)
+        self.assertEqual(counts['7/3/1']['contig_count'], 1)
+        self.assertEqual(counts['7/2/1']['error'], 'Object 2 has been deleted')
+        self.assertNotIn('contig_count', counts['7/2/1'])
+
+    def test_estimate_needs_every_object(self):
+        impl = self.impl({1: [{'md5': 'a'}],
+                          2: ValueError('Object 2 has been deleted')})
+        self.assertRaises(ValueError, impl.estimate_distinct_contigs,
+                          {'token': 't'}, 'ws', ['1', '2'])
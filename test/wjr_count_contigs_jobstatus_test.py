@@ -0,0 +1,104 @@
+import unittest
+import threading
+import time
+
+from wjr_count_contigs.jobstatus import JobStatusTracker
+
+
+class FakeJob(object):
+    '''A job service answering from a list of states, one per call.'''
+
+    def __init__(self, *states):
+        self.states = list(states)
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        if len(self.states) > 1:
+            return self.states.pop(0)
+        return self.states[0]
+
+
+QUEUED = {'job_state': 'queued', 'finished': 0}
+RUNNING = {'job_state': 'in-progress', 'finished': 0}
+DONE = {'job_state': 'completed', 'finished': 1, 'result': [1]}
+
+
+class wjr_count_contigsJobStatusTest(unittest.TestCase):
+
+    def test_finished_state_is_cached(self):
+        tracker = JobStatusTracker()
+        job = FakeJob(DONE)
+        self.assertEqual(tracker.check('j', job.check), DONE)
+        self.assertEqual(tracker.check('j', job.check), DONE)
+        self.assertEqual(job.calls, 1)
+
+    def test_wait_until_state_changes(self):
+        tracker = JobStatusTracker(poll_interval=0.01)
+        job = FakeJob(QUEUED, QUEUED, RUNNING, DONE)
+        self.assertEqual(tracker.check('j', job.check, 5), RUNNING)
+        self.assertEqual(job.calls, 3)
+
+    def test_wait_runs_out(self):
+        tracker = JobStatusTracker(poll_interval=0.01)
+        began = time.time()
+        self.assertEqual(tracker.check('j', FakeJob(RUNNING).check, 0.1),
+                         RUNNING)
+        self.assertGreaterEqual(time.time() - began, 0.1)
+
+    def test_waiters_are_limited(self):
+        tracker = JobStatusTracker(poll_interval=0.01, max_waiters=1)
+        waiter = threading.Thread(target=tracker.check,
+                                  args=('a', FakeJob(RUNNING).check, 0.5))
+        waiter.start()
+        time.sleep(0.1)
+        began = time.time()
+        self.assertEqual(tracker.check('b', FakeJob(RUNNING).check, 0.5),
+                         RUNNING)
+        self.assertLess(time.time() - began, 0.2)
+        waiter.join()
+        self.assertEqual(tracker.stats()['waits_declined'], 1)
+        self.assertEqual(tracker.stats()['waiting'], 0)
+
+    def test_concurrent_checks_share_a_fetch(self):
+        tracker = JobStatusTracker()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch():
+            started.set()
+            release.wait(5)
+            return RUNNING
+        results = []
+
+        def check():
+            results.append(tracker.check('j', fetch))
+        threads = [threading.Thread(target=check) for _ in range(3)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for t in threads[1:]:
+            t.start()
+        deadline = time.time() + 5
+        while tracker.stats()['coalesced'] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [RUNNING] * 3)
+        self.assertEqual(tracker.stats()['fetches'], 1)
+        self.assertEqual(tracker.stats()['coalesced'], 2)
+
+    def test_slot_is_held_only_while_fetching(self):
+        tracker = JobStatusTracker(poll_interval=0.05)
+        job = FakeJob(RUNNING, RUNNING, DONE)
+        held = []
+        events = []
+
+        def fetch():
+            # the number of slots held during each fetch
+            events.append(('fetch', len(held)))
+            return job.check()
+        tracker.check('j', fetch, 5, acquire=lambda: held.append(1),
+                      release=held.pop)
+        self.assertEqual(events, [('fetch', 1)] * 3)
+        self.assertEqual(held, [])
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+
+from wjr_count_contigs.jsoncodec import JSONCodec
+
+SAMPLE = {'third': 1 / 3.0, 'tenth': 0.1, 'big': 1e300, 'int': 2 ** 64,
+          'text': u'caf\xe9 ☃ "quoted" a/b', 'list': [None, True, 1.5]}
+
+
+def codec(backend):
+    try:
+        return JSONCodec(backend)
+    except ImportError:
+        raise unittest.SkipTest(backend + ' is not installed')
+
+
+class wjr_count_contigsJSONCodecTest(unittest.TestCase):
+
+    def test_default_is_the_standard_library(self):
+        self.assertEqual(JSONCodec().name, 'json')
+        self.assertIn(JSONCodec('auto').name, ('simplejson', 'json'))
+
+    def test_simplejson_matches_json(self):
+        self.assertEqual(codec('simplejson').dumps(SAMPLE), json.dumps(SAMPLE))
+        encoded = json.dumps(SAMPLE)
+        self.assertEqual(codec('simplejson').loads(encoded), SAMPLE)
+
+    def test_ujson_matches_json_to_15_digits(self):
+        ujson = codec('ujson')
+        decoded = json.loads(ujson.dumps(SAMPLE))
+        for key in ('int', 'text', 'list', 'tenth'):
+            self.assertEqual(decoded[key], SAMPLE[key])
+        self.assertAlmostEqual(decoded['third'], SAMPLE['third'], places=14)
+        self.assertAlmostEqual(decoded['big'] / SAMPLE['big'], 1, places=14)
+        # parsing is exact
+        self.assertEqual(ujson.loads(json.dumps(SAMPLE))['third'],
+                         SAMPLE['third'])
+
+    def test_fallback_to_encoder_class(self):
+        class SetEncoder(json.JSONEncoder):
+            def default(self, obj):
+                return sorted(obj)
+        for backend in ('json', 'simplejson', 'ujson'):
+            try:
+                c = JSONCodec(backend, encoder_cls=SetEncoder)
+            except ImportError:
+                continue
+            self.assertEqual(json.loads(c.dumps({'s': set([2, 1])})),
+                             {'s': [1, 2]})
+
+    def test_iterencode_chunks(self):
+        c = JSONCodec('json', chunk_size=100)
+        data = [{'n': i} for i in range(1000)]
+        chunks = list(c.iterencode(data))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(''.join(chunks)), data)
@@ -0,0 +1,121 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from wjr_count_contigs import localjobs
+from wjr_count_contigs.localjobs import LocalJobRunner
+
+
+def echo_runner(input_path, output_path, token):
+    with open(input_path) as f:
+        req = json.load(f)
+    with open(output_path, 'w') as f:
+        json.dump({'result': [req['params'], token]}, f)
+
+
+def failing_runner(input_path, output_path, token):
+    raise RuntimeError('no workspace')
+
+
+class wjr_count_contigsLocalJobsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.store_dir)
+
+    def runner(self, runner=echo_runner, **kw):
+        jobs = LocalJobRunner(self.store_dir, runner, processes=1, **kw)
+        self.addCleanup(lambda: jobs._pool and jobs._pool.terminate())
+        return jobs
+
+    def wait(self, jobs, job_id, user_id):
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            state = jobs.check_job(job_id, user_id)
+            if state['finished']:
+                return state
+            time.sleep(0.05)
+        self.fail('job %s did not finish' % job_id)
+
+    def write_finished(self, job_id, finish_time):
+        localjobs._write_record(self.store_dir, {
+            'job_id': job_id, 'user_id': 'alice', 'job_state': 'completed',
+            'finished': 1, 'pid': os.getpid(), 'finish_time': finish_time})
+
+    def test_run_check_complete(self):
+        jobs = self.runner()
+        job_id = jobs.run_job({'method': 'wjr_count_contigs.count_contigs',
+                               'params': ['ws', 'obj']}, 'token', 'alice')
+        state = self.wait(jobs, job_id, 'alice')
+        self.assertEqual(state['job_state'], localjobs.COMPLETED)
+        self.assertEqual(state['result'], [['ws', 'obj'], 'token'])
+        self.assertIsNone(state['error'])
+        # the request and response files are cleaned up
+        self.assertEqual(os.listdir(self.store_dir), [job_id + '.json'])
+
+    def test_failing_job(self):
+        jobs = self.runner(failing_runner)
+        job_id = jobs.run_job({'method': 'wjr_count_contigs.count_contigs',
+                               'params': []}, 'token', 'alice')
+        state = self.wait(jobs, job_id, 'alice')
+        self.assertEqual(state['job_state'], localjobs.ERROR)
+        self.assertIn('no workspace', state['error']['message'])
+
+    def test_other_users_jobs_are_hidden(self):
+        jobs = self.runner()
+        job_id = jobs.run_job({'method': 'wjr_count_contigs.count_contigs',
+                               'params': []}, 'token', 'alice')
+        self.assertRaises(ValueError, jobs.check_job, job_id, 'bob')
+        self.assertRaises(ValueError, jobs.check_job, '../' + job_id, 'alice')
+        self.wait(jobs, job_id, 'alice')
+
+    def test_interrupted_job(self):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        localjobs._write_record(self.store_dir, {
+            'job_id': 'abc', 'user_id': 'alice', 'job_state': 'in-progress',
+            'finished': 0, 'pid': pid})
+        state = self.runner().check_job('abc', 'alice')
+        self.assertEqual(state['job_state'], localjobs.ERROR)
+        self.assertEqual(state['error']['name'], 'Job interrupted')
+
+    def test_failure_outside_the_runner_finishes_the_job(self):
+        # the record cannot be written back once the job has started
+        localjobs._write_record(self.store_dir, {
+            'job_id': 'abc', 'user_id': 'alice', 'job_state': 'queued',
+            'finished': 0, 'pid': os.getpid(), 'request': {'params': []}})
+        write_record = localjobs._write_record
+        calls = []
+
+        def flaky_write(store_dir, record):
+            calls.append(record['job_state'])
+            if record['job_state'] == localjobs.COMPLETED:
+                raise IOError('disk full')
+            write_record(store_dir, record)
+        localjobs._write_record = flaky_write
+        try:
+            localjobs._execute_job(self.store_dir, 'abc', echo_runner, 't')
+        finally:
+            localjobs._write_record = write_record
+        self.assertEqual(calls, ['in-progress', 'completed', 'error'])
+        state = self.runner().check_job('abc', 'alice')
+        self.assertEqual(state['job_state'], localjobs.ERROR)
+        self.assertIn('disk full', state['error']['message'])
+
+    def test_pruned_job_is_skipped(self):
+        localjobs._execute_job(self.store_dir, 'abc', echo_runner, 't')
+        self.assertEqual(os.listdir(self.store_dir), [])
+
+    def test_prune_by_count_and_age(self):
+        now = time.time()
+        for i in range(5):
+            self.write_finished('%d' % i, now - i)
+        self.write_finished('5', now - 1000)
+        self.runner(max_finished=3, max_age=100).prune()
+        self.assertEqual(sorted(os.listdir(self.store_dir)),
+                         ['0.json', '1.json', '2.json'])
@@ -0,0 +1,144 @@
+import unittest
+import threading
+import time
+
+from wjr_count_contigs import logqueue
+from wjr_count_contigs.logqueue import QueuedLog
+
+
+class FakeLogger(object):
+    '''Filters by level and records messages when they are written, like
+    biokbase.log. Writing blocks while gate is clear.'''
+
+    def __init__(self):
+        self.level = 6
+        self.messages = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.writing = threading.Event()
+
+    def log_message(self, level, message, *args):
+        self.writing.set()
+        self.gate.wait()
+        if level <= self.level:
+            self.messages.append(message)
+
+    def set_log_level(self, level):
+        self.level = level
+
+    def get_log_level(self):
+        return self.level
+
+
+class wjr_count_contigsLogQueueTest(unittest.TestCase):
+
+    def stalled(self, overflow, max_queue=2):
+        '''A queue whose writer is stuck on the record 'stuck', with
+        max_queue free places.'''
+        logger = FakeLogger()
+        logger.gate.clear()
+        log = QueuedLog(logger, max_queue=max_queue, overflow=overflow,
+                        block_timeout=0.1)
+        log.log_message(6, 'stuck')
+        self.assertTrue(logger.writing.wait(5))
+        self.addCleanup(log.close)
+        self.addCleanup(logger.gate.set)
+        return logger, log
+
+    def finish(self, logger, log):
+        logger.gate.set()
+        log.close()
+        return logger.messages
+
+    def test_drop_newest(self):
+        logger, log = self.stalled(logqueue.DROP_NEWEST)
+        for m in 'abcd':
+            log.log_message(6, m)
+        self.assertEqual(log.stats()['dropped'], 2)
+        self.assertEqual(self.finish(logger, log), ['stuck', 'a', 'b'])
+
+    def test_drop_oldest(self):
+        logger, log = self.stalled(logqueue.DROP_OLDEST)
+        for m in 'abcd':
+            log.log_message(6, m)
+        self.assertEqual(log.stats()['dropped'], 2)
+        self.assertEqual(self.finish(logger, log), ['stuck', 'c', 'd'])
+
+    def test_block(self):
+        logger, log = self.stalled(logqueue.BLOCK)
+        for m in 'ab':
+            log.log_message(6, m)
+        began = time.time()
+        log.log_message(6, 'c')
+        # waited block_timeout, then dropped it
+        self.assertGreaterEqual(time.time() - began, 0.1)
+        self.assertEqual(log.stats()['dropped'], 1)
+        self.assertEqual(self.finish(logger, log), ['stuck', 'a', 'b'])
+
+    def test_close_flushes(self):
+        logger = FakeLogger()
+        log = QueuedLog(logger, flush_interval=10)
+        for i in range(100):
+            log.log_message(6, str(i))
+        log.close()
+        self.assertEqual(logger.messages, [str(i) for i in range(100)])
+        self.assertEqual(log.stats()['written'], 100)
+        # after close records are written directly
+        log.log_message(6, 'late')
+        self.assertEqual(logger.messages[-1], 'late')
+
+    def test_level_changes_keep_their_place(self):
+        logger, log = self.stalled(logqueue.BLOCK, max_queue=10)
+        log.log_message(7, 'debug before')
+        changed = threading.Thread(target=log.set_log_level, args=(7,))
+        changed.start()
+        time.sleep(0.05)
+        log.log_message(7, 'debug after')
+        messages = self.finish(logger, log)
+        changed.join()
+        self.assertEqual(messages, ['stuck', 'debug after'])
+        self.assertEqual(log.get_log_level(), 7)
+
+    def test_late_records_keep_their_time(self):
+        logger, log = self.stalled(logqueue.BLOCK)
+        log.log_message(6, 'waited')
+        log.log_message(6, ['two', 'lines'])
+        logqueue.LATE_AFTER, late_after = 0, logqueue.LATE_AFTER
+        try:
+            messages = self.finish(logger, log)
+        finally:
+            logqueue.LATE_AFTER = late_after
+        self.assertRegexpMatches(messages[1], r'^\[logged [-0-9]+ [:0-9.]+\] '
+                                 'waited$')
+        self.assertTrue(all(m.startswith('[logged ') for m in messages[2]))
+
+    def test_late_unicode_list(self):
+        logger, log = self.stalled(logqueue.BLOCK)
+        log.log_message(6, [u'caf\xe9', 'plain'])
+        log.log_message(6, 'after')
+        logqueue.LATE_AFTER, late_after = 0, logqueue.LATE_AFTER
+        try:
+            logger.gate.set()
+            deadline = time.time() + 5
+            while len(logger.messages) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            logqueue.LATE_AFTER = late_after
+        self.assertEqual(len(logger.messages), 3)
+        self.assertTrue(logger.messages[1][0].endswith(u'] caf\xe9'))
+        self.assertEqual(log.stats()['failed'], 0)
+
+    def test_dead_writer_is_replaced(self):
+        logger = FakeLogger()
+        log = QueuedLog(logger)
+        self.addCleanup(log.close)
+        log.log_message(6, 'one')
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        log._writer = dead
+        log.log_message(6, 'two')
+        self.assertIsNot(log._writer, dead)
+        self.assertTrue(log._writer.is_alive())
+        log.close()
+        self.assertEqual(logger.messages, ['one', 'two'])
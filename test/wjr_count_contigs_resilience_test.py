@@ -0,0 +1,163 @@
+import unittest
+import threading
+import time
+
+import requests
+
+from wjr_count_contigs import resilience
+from wjr_count_contigs.resilience import CircuitBreaker, CircuitOpenError, \
+    call_with_retries
+
+
+class FakeClock(object):
+    '''Stands in for the time module; sleep() only advances the clock.'''
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Flaky(object):
+    '''A callable raising the given errors in turn, then returning 'ok'.'''
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+def transient():
+    return requests.exceptions.ConnectionError('connection refused')
+
+
+class wjr_count_contigsResilienceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        resilience.time = self.clock
+
+    def tearDown(self):
+        resilience.time = time
+
+    def test_retries_transient_errors(self):
+        fn = Flaky(transient(), transient())
+        self.assertEqual(call_with_retries(fn, retries=2, backoff=0.2), 'ok')
+        self.assertEqual(fn.calls, 3)
+        # full jitter: each sleep is at most the exponential backoff
+        self.assertEqual(len(self.clock.sleeps), 2)
+        self.assertLessEqual(self.clock.sleeps[0], 0.2)
+        self.assertLessEqual(self.clock.sleeps[1], 0.4)
+
+    def test_gives_up_after_retries(self):
+        fn = Flaky(transient(), transient(), transient())
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          call_with_retries, fn, retries=2)
+        self.assertEqual(fn.calls, 3)
+
+    def test_other_errors_are_not_retried(self):
+        fn = Flaky(ValueError('no such object'))
+        self.assertRaises(ValueError, call_with_retries, fn, retries=2)
+        self.assertEqual(fn.calls, 1)
+
+    def test_breaker_opens_and_half_opens(self):
+        breaker = CircuitBreaker('workspace', failure_threshold=2,
+                                 reset_timeout=30)
+        for _ in range(2):
+            self.assertRaises(requests.exceptions.ConnectionError,
+                              call_with_retries, Flaky(transient()),
+                              retries=0, breaker=breaker)
+        self.assertEqual(breaker.state(), 'open')
+        fn = Flaky()
+        self.assertRaises(CircuitOpenError, call_with_retries, fn,
+                          breaker=breaker)
+        self.assertEqual(fn.calls, 0)
+        self.clock.now += 30
+        self.assertEqual(breaker.state(), 'half-open')
+        # a single trial call is let through
+        breaker.before_call()
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        breaker.record_success()
+        self.assertEqual(breaker.state(), 'closed')
+        self.assertEqual(call_with_retries(fn, breaker=breaker), 'ok')
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker('workspace', failure_threshold=1,
+                                 reset_timeout=30)
+        breaker.record_failure()
+        self.clock.now += 30
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          call_with_retries, Flaky(transient()), retries=0,
+                          breaker=breaker)
+        self.assertEqual(breaker.state(), 'open')
+
+    def test_non_transient_error_counts_as_success(self):
+        breaker = CircuitBreaker('workspace', failure_threshold=2)
+        breaker.record_failure()
+        self.assertRaises(ValueError, call_with_retries,
+                          Flaky(ValueError('no such object')), retries=0,
+                          breaker=breaker)
+        # the service answered, so the failure count starts over
+        breaker.record_failure()
+        self.assertEqual(breaker.state(), 'closed')
+
+
+class wjr_count_contigsHedgingTest(unittest.TestCase):
+    '''Hedging uses threads and the real clock.'''
+
+    def test_slow_call_is_hedged(self):
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                # the first call hangs until the test ends
+                release.wait(5)
+                return 'slow'
+            return 'fast'
+        try:
+            self.assertEqual(call_with_retries(fn, hedge_after=0.05), 'fast')
+        finally:
+            release.set()
+        self.assertEqual(len(calls), 2)
+
+    def test_fast_call_is_not_hedged(self):
+        fn = Flaky()
+        self.assertEqual(call_with_retries(fn, hedge_after=1), 'ok')
+        self.assertEqual(fn.calls, 1)
+
+    def test_hedged_error_waits_for_the_other_call(self):
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                raise ValueError('first failed')
+            time.sleep(0.2)
+            return 'second'
+        self.assertEqual(call_with_retries(fn, hedge_after=0.05), 'second')
+
+    def test_hedged_calls_both_fail(self):
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.1)
+            raise ValueError('call %d failed' % len(calls))
+        with self.assertRaises(ValueError) as cm:
+            call_with_retries(fn, hedge_after=0.05)
+        self.assertEqual(len(calls), 2)
+        self.assertIn('failed', str(cm.exception))
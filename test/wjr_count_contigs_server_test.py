@@ -62,4 +62,50 @@ class wjr_count_contigsTest(unittest.TestCase):
             [{'type': 'KBaseGenomes.ContigSet', 'name': obj_name, 'data': obj}]})
         ret = self.getImpl().count_contigs(self.getContext(), self.getWsName(), obj_name)
         self.assertEqual(ret[0]['contig_count'], 1)
-        
\ No newline at end of file
+        
+    def test_count_contigs_in_workspace(self):
+        contigs = [{'id': str(i), 'length': 10, 'md5': 'md5' + str(i),
+                    'sequence': 'agcttttcat'} for i in range(3)]
+        obj = {'contigs': contigs, 'id': 'id', 'md5': 'md5', 'name': 'name',
+               'source': 'source', 'source_id': 'source_id', 'type': 'type'}
+        self.getWsClient().save_objects({'workspace': self.getWsName(), 'objects':
+            [{'type': 'KBaseGenomes.ContigSet', 'name': 'contigset.ws.1', 'data': obj},
+             {'type': 'KBaseGenomes.ContigSet', 'name': 'contigset.ws.2', 'data': obj}]})
+        ret = self.getImpl().count_contigs_in_workspace(self.getContext(), self.getWsName())[0]
+        counts = dict((c['name'], c['contig_count']) for c in ret['counts'])
+        self.assertEqual(counts['contigset.ws.1'], 3)
+        self.assertEqual(counts['contigset.ws.2'], 3)
+        self.assertEqual(ret['object_count'], len(ret['counts']))
+        self.assertEqual(ret['total_contig_count'], sum(counts.values()))
+        # unchanged versions are not downloaded again
+        ret = self.getImpl().count_contigs_in_workspace(self.getContext(), self.getWsName())[0]
+        self.assertEqual(ret['cached_count'], ret['object_count'])
+
+    def test_estimate_distinct_contigs(self):
+        def contigset(first, last):
+            contigs = [{'id': str(i), 'length': 10, 'md5': 'md5-%d' % i,
+                        'sequence': 'agcttttcat'} for i in range(first, last)]
+            return {'contigs': contigs, 'id': 'id', 'md5': 'md5', 'name': 'name',
+                    'source': 'source', 'source_id': 'source_id', 'type': 'type'}
+        self.getWsClient().save_objects({'workspace': self.getWsName(), 'objects':
+            [{'type': 'KBaseGenomes.ContigSet', 'name': 'contigset.hll.1', 'data': contigset(0, 60)},
+             {'type': 'KBaseGenomes.ContigSet', 'name': 'contigset.hll.2', 'data': contigset(30, 90)}]})
+        ret = self.getImpl().estimate_distinct_contigs(self.getContext(), self.getWsName(),
+            ['contigset.hll.1', 'contigset.hll.2'])[0]
+        self.assertEqual(ret['contigset_count'], 2)
+        self.assertEqual(ret['total_contig_count'], 120)
+        # small sets are counted almost exactly
+        self.assertAlmostEqual(ret['distinct_contig_estimate'], 90, delta=3)
+        self.assertAlmostEqual(ret['duplicate_contig_estimate'], 30, delta=3)
+        # contigs without an md5 are distinct, and a repeated set counts once
+        nomd5 = contigset(0, 10)
+        for contig in nomd5['contigs']:
+            del contig['md5']
+        self.getWsClient().save_objects({'workspace': self.getWsName(), 'objects':
+            [{'type': 'KBaseGenomes.ContigSet', 'name': 'contigset.hll.3', 'data': nomd5}]})
+        ret = self.getImpl().estimate_distinct_contigs(self.getContext(), self.getWsName(),
+            ['contigset.hll.1', 'contigset.hll.2', 'contigset.hll.3', 'contigset.hll.1'])[0]
+        self.assertEqual(ret['contigset_count'], 3)
+        self.assertEqual(ret['total_contig_count'], 130)
+        self.assertAlmostEqual(ret['distinct_contig_estimate'], 100, delta=3)
+        self.assertAlmostEqual(ret['duplicate_contig_estimate'], 30, delta=3)
@@ -0,0 +1,129 @@
+import unittest
+import httplib
+import os
+import signal
+import socket
+import threading
+import time
+
+from wjr_count_contigs import standalone
+
+
+def app(environ, start_response):
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(0.5)
+    if environ['PATH_INFO'] == '/die':
+        os._exit(1)
+    if environ['PATH_INFO'] == '/echo':
+        body = environ['wsgi.input'].read()
+    else:
+        # leaves any request body unread
+        body = environ['PATH_INFO']
+    start_response('200 OK', [('Content-Type', 'text/plain'),
+                              ('Content-Length', str(len(body)))])
+    return [body]
+
+
+class wjr_count_contigsStandaloneTest(unittest.TestCase):
+
+    def start(self, threads=1, keepalive_timeout=2):
+        server = standalone.make_server('localhost', 0, app, threads=threads,
+                                        keepalive_timeout=keepalive_timeout)
+        server.start_threads()
+        t = threading.Thread(target=server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.stop_threads, 5)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def connect(self, server):
+        return httplib.HTTPConnection('localhost', server.server_address[1],
+                                      timeout=10)
+
+    def get(self, conn, path, body=None):
+        conn.request('POST' if body else 'GET', path, body)
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+    def test_keep_alive(self):
+        server = self.start()
+        conn = self.connect(server)
+        resp, body = self.get(conn, '/one')
+        self.assertEqual(body, '/one')
+        self.assertNotEqual(resp.getheader('connection'), 'close')
+        sock = conn.sock
+        resp, body = self.get(conn, '/two')
+        self.assertEqual(body, '/two')
+        # the same connection served both requests
+        self.assertIs(conn.sock, sock)
+
+    def test_unread_body_is_drained(self):
+        server = self.start()
+        conn = self.connect(server)
+        resp, body = self.get(conn, '/ignore', 'x' * 100000)
+        self.assertEqual(body, '/ignore')
+        resp, body = self.get(conn, '/echo', 'abc')
+        self.assertEqual(body, 'abc')
+
+    def test_idle_connections_do_not_hold_threads(self):
+        server = self.start(threads=1, keepalive_timeout=3)
+        idle = [self.connect(server) for _ in range(4)]
+        for conn in idle:
+            self.get(conn, '/idle')
+        began = time.time()
+        resp, body = self.get(self.connect(server), '/new')
+        self.assertEqual(body, '/new')
+        self.assertLess(time.time() - began, 1)
+
+    def test_idle_connection_times_out(self):
+        server = self.start(keepalive_timeout=0.2)
+        conn = self.connect(server)
+        self.get(conn, '/one')
+        time.sleep(0.5)
+        self.assertEqual(conn.sock.recv(1), '')
+
+    def fork_master(self, processes, **kw):
+        '''Runs standalone.serve in a child; returns its pid and a
+        connection to the server.'''
+        server = standalone.make_server('localhost', 0, app, threads=2)
+        port = server.server_address[1]
+        pid = os.fork()
+        if pid == 0:
+            try:
+                standalone.serve(server, processes, shutdown_timeout=5, **kw)
+            finally:
+                os._exit(0)
+        server.server_close()
+        conn = httplib.HTTPConnection('localhost', port, timeout=10)
+        for _ in range(50):
+            try:
+                conn.connect()
+                break
+            except socket.error:
+                time.sleep(0.1)
+        return pid, conn
+
+    def test_worker_exit_is_reported(self):
+        exited_r, exited_w = os.pipe()
+        self.addCleanup(os.close, exited_r)
+        self.addCleanup(os.close, exited_w)
+
+        def on_worker_exit(pid):
+            os.write(exited_w, '%d\n' % pid)
+        pid, conn = self.fork_master(2, on_worker_exit=on_worker_exit)
+        conn.request('GET', '/die')
+        self.assertRaises(httplib.HTTPException, conn.getresponse)
+        exited = os.read(exited_r, 100)
+        self.assertTrue(exited.strip().isdigit())
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    def test_shutdown_finishes_requests(self):
+        pid, conn = self.fork_master(1)
+        conn.request('GET', '/slow')
+        time.sleep(0.2)
+        os.kill(pid, signal.SIGTERM)
+        self.assertEqual(conn.getresponse().read(), '/slow')
+        os.waitpid(pid, 0)
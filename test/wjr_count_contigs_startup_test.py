@@ -0,0 +1,87 @@
+import unittest
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from os import environ
+
+# Modules only the server's request handling needs; an async job must not
+# import them. See "Startup budget" in README.md.
+DEFERRED_MODULES = ['biokbase.nexus',
+                    'wjr_count_contigs.admission',
+                    'wjr_count_contigs.compression',
+                    'wjr_count_contigs.jobstatus',
+                    'wjr_count_contigs.jsoncodec',
+                    'wjr_count_contigs.localjobs',
+                    'wjr_count_contigs.logqueue']
+
+# seconds; see "Startup budget" in README.md
+STARTUP_BUDGET = 1.0
+
+REPORT = '''
+report = startup.report()
+report['imported'] = [m for m in %r if sys.modules.get(m)]
+report['loggers_built'] = server.application._userlog is not None
+report['auth_client_built'] = server.application._auth_client is not None
+print(json.dumps(report))
+''' % DEFERRED_MODULES
+
+IMPORT_SERVER = '''
+import json, sys
+from wjr_count_contigs import startup
+import wjr_count_contigs.wjr_count_contigsServer as server
+''' + REPORT
+
+# runs a job the way the async job script does, through process_async_cli
+RUN_JOB = '''
+import json, sys
+from wjr_count_contigs import startup
+import wjr_count_contigs.wjr_count_contigsServer as server
+code = server.process_async_cli(sys.argv[1], sys.argv[2], 'token')
+startup.mark('job')
+''' + REPORT
+
+
+class wjr_count_contigsStartupTest(unittest.TestCase):
+
+    def run_python(self, code, *args):
+        out = subprocess.check_output([sys.executable, '-c', code] +
+                                      list(args), env=environ)
+        return json.loads(out.splitlines()[-1])
+
+    def import_server(self):
+        return self.run_python(IMPORT_SERVER)
+
+    def check_budget(self, report):
+        # the documented budget; a slow machine may set a larger one
+        budget = float(environ.get('KB_STARTUP_BUDGET') or STARTUP_BUDGET)
+        self.assertLess(report['import_seconds'], budget,
+                        'startup took %ss: %s' %
+                        (report['import_seconds'], report['phases']))
+
+    def test_import_is_lazy(self):
+        report = self.import_server()
+        self.assertEqual(report['imported'], [])
+        self.assertFalse(report['loggers_built'])
+        self.assertFalse(report['auth_client_built'])
+        self.check_budget(report)
+
+    def test_async_job_is_lazy(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        input_path = os.path.join(tmp, 'input.json')
+        output_path = os.path.join(tmp, 'output.json')
+        with open(input_path, 'w') as f:
+            json.dump({'method': 'wjr_count_contigs.count_contigs',
+                       'params': ['no_such_workspace', 'no_such_object']}, f)
+        report = self.run_python(RUN_JOB, input_path, output_path)
+        self.assertEqual(report['imported'], [])
+        self.assertFalse(report['loggers_built'])
+        self.assertFalse(report['auth_client_built'])
+        # the job itself fails, with no workspace to talk to
+        with open(output_path) as f:
+            self.assertIn('error', json.load(f))
+        self.check_budget(report)
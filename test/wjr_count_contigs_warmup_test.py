@@ -0,0 +1,84 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+from StringIO import StringIO
+
+import wjr_count_contigs.wjr_count_contigsServer as server
+
+
+class FakeAuthClient(object):
+
+    def validate_token(self, token):
+        return token, None, None
+
+
+class wjr_count_contigsWarmUpTest(unittest.TestCase):
+    '''Worker warm-up and the ready file, as a pre-forking server uses them.'''
+
+    def setUp(self):
+        self.app = server.application
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.ready_file = os.path.join(self.tmp, 'ready')
+        saved = (server.config, self.app.warm, self.app._auth_client)
+        self.addCleanup(self.restore, saved)
+        server.config = dict(server.config or {})
+        server.config['ready-file'] = self.ready_file
+        server.config['job-backend'] = 'remote'
+        self.app._auth_client = FakeAuthClient()
+        self.app.warm = False
+
+    def restore(self, saved):
+        server.config, self.app.warm, self.app._auth_client = saved
+
+    def status(self):
+        body = json.dumps({'method': 'wjr_count_contigs.status',
+                           'params': [], 'version': '1.1', 'id': '1'})
+        environ = {'REQUEST_METHOD': 'POST',
+                   'CONTENT_LENGTH': str(len(body)),
+                   'REMOTE_ADDR': '127.0.0.1',
+                   'wsgi.input': StringIO(body)}
+        resp = self.app(environ, lambda status, headers: None)
+        return json.loads(''.join(resp))['result'][0]
+
+    def warm_up_in_child(self, worker_id, num_workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                server.warm_up_worker(worker_id, num_workers)
+                server.stop_worker()
+            except Exception:
+                code = 1
+            os._exit(code)
+        _, code = os.waitpid(pid, 0)
+        self.assertEqual(code, 0)
+
+    def test_ready_file_waits_for_every_worker(self):
+        # left over from an earlier run
+        open(self.ready_file, 'w').close()
+        server.preload()
+        self.assertFalse(os.path.exists(self.ready_file))
+        for worker_id in (1, 2):
+            self.warm_up_in_child(worker_id, 3)
+            self.assertFalse(os.path.exists(self.ready_file))
+        self.warm_up_in_child(3, 3)
+        with open(self.ready_file) as f:
+            self.assertEqual(f.read(), '3\n')
+
+    def test_status_reports_warm_up(self):
+        self.assertEqual(self.status()['state'], 'WARMING')
+        server.warm_up_worker(1, 1)
+        self.assertEqual(self.status()['state'], 'OK')
+        self.assertTrue(os.path.exists(self.ready_file))
+        phases = [p['name'] for p in self.status()['startup']['phases']]
+        self.assertIn('worker warm-up', phases)
+
+    def test_local_job_pool_is_not_started(self):
+        server.config['job-backend'] = 'local'
+        server.warm_up_worker(1, 1)
+        runner = server._local_job_runner
+        self.assertTrue(runner is None or runner._pool is None)
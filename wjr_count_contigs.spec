@@ -1,6 +1,7 @@
 /*
 A KBase module: wjr_count_contigs
-This sample module contains one small method - count_contigs.
+This sample module contains three small methods - count_contigs,
+count_contigs_in_workspace and estimate_distinct_contigs.
 */
 
 module wjr_count_contigs {
@@ -23,4 +24,72 @@ module wjr_count_contigs {
 	contigset_id - the ContigSet to count.
 	*/
 	funcdef count_contigs(workspace_name,contigset_id) returns (CountContigsResults) authentication required;
+
+	/*
+	The contig count of one ContigSet in a workspace.
+	ref - the ContigSet's reference, including its version.
+	error - why the ContigSet could not be counted, for example because it
+	    was deleted after it was listed; contig_count is then left out.
+	@optional contig_count error
+	*/
+	typedef structure {
+	    string name;
+	    string ref;
+	    int contig_count;
+	    string error;
+	} ObjectContigCount;
+
+	/*
+	cached_count - how many of the counts were reused from earlier calls.
+	error_count - how many ContigSets could not be counted; they are left
+	    out of total_contig_count.
+	*/
+	typedef structure {
+	    workspace_name workspace_name;
+	    int object_count;
+	    int total_contig_count;
+	    int cached_count;
+	    int error_count;
+	    list<ObjectContigCount> counts;
+	} WorkspaceContigCounts;
+
+	/*
+	Count contigs in every ContigSet in a workspace
+	workspace_name - the workspace to search.
+	*/
+	funcdef count_contigs_in_workspace(workspace_name) returns (WorkspaceContigCounts) authentication required;
+
+	/*
+	The contig count and estimated distinct contig count of one ContigSet.
+	*/
+	typedef structure {
+	    string name;
+	    string ref;
+	    int contig_count;
+	    int distinct_contig_estimate;
+	} ContigSetDistinctEstimate;
+
+	/*
+	Estimates from HyperLogLog sketches of the contigs' md5 checksums.
+	Contigs without an md5 cannot be compared and are counted as distinct,
+	and a ContigSet listed more than once is counted once.
+	distinct_contig_estimate - distinct contigs across all the ContigSets.
+	duplicate_contig_estimate - total_contig_count minus the distinct count.
+	shared_contig_estimate - distinct contigs counted in more than one
+	    ContigSet, summed over the extra ContigSets they appear in.
+	*/
+	typedef structure {
+	    int contigset_count;
+	    int total_contig_count;
+	    int distinct_contig_estimate;
+	    int duplicate_contig_estimate;
+	    int shared_contig_estimate;
+	    list<ContigSetDistinctEstimate> per_set;
+	} DistinctContigsEstimate;
+
+	/*
+	Estimate how many unique contigs there are across ContigSets
+	contigset_ids - the ContigSets to compare.
+	*/
+	funcdef estimate_distinct_contigs(workspace_name, list<contigset_id> contigset_ids) returns (DistinctContigsEstimate) authentication required;
 };
\ No newline at end of file